@@ -0,0 +1,155 @@
+from pathlib import Path
+
+from click import Choice
+from click import IntRange
+from click import Path as PathClick
+from click import argument
+from click import echo
+from click import group
+from click import option
+from orjson import OPT_INDENT_2
+from orjson import dumps
+from orjson import loads
+
+from .generate import generate_archive
+from .imports import check_imports
+from .imports import cli_module
+from .runner import percentiles
+from .runner import run_benchmark
+from .scenarios import scenarios
+from .tuning import run_tuning_benchmark
+from .tuning import tuning_profiles
+from .tuning import tuning_scenarios
+from .useragents import benchmark_user_agents
+
+
+@group("benchmark")
+def main():
+    pass
+
+
+@main.command("generate")
+@argument("folder", type=PathClick(file_okay=False, path_type=Path))
+@option("--users", type=IntRange(1), default=200, show_default=True)
+@option("--submissions", type=IntRange(0), default=5000, show_default=True)
+@option("--journals", type=IntRange(0), default=500, show_default=True)
+@option("--comments", type=IntRange(0), default=20000, show_default=True)
+@option("--comments-depth", type=IntRange(1), default=12, show_default=True)
+@option("--image-size", type=(IntRange(1), IntRange(1)), default=(1280, 960), show_default=True)
+@option("--seed", type=int, default=0, show_default=True)
+def generate(
+    folder: Path,
+    users: int,
+    submissions: int,
+    journals: int,
+    comments: int,
+    comments_depth: int,
+    image_size: tuple[int, int],
+    seed: int,
+):
+    echo(generate_archive(folder, users, submissions, journals, comments, comments_depth, image_size, seed))
+
+
+@main.command("run")
+@argument("database", type=PathClick(exists=True, dir_okay=False, resolve_path=True, path_type=Path))
+@option("--scenario", "names", type=Choice(list(scenarios)), multiple=True, help="Scenarios to run [default: all]")
+@option("--requests", type=IntRange(1), default=200, show_default=True)
+@option("--warmup", type=IntRange(0), default=20, show_default=True)
+@option("--seed", type=int, default=0, show_default=True)
+@option("--cache/--no-cache", default=True, show_default=True)
+@option("--output", type=PathClick(dir_okay=False, writable=True, path_type=Path), default=None)
+def run(database: Path, names: tuple[str], requests: int, warmup: int, seed: int, cache: bool, output: Path | None):
+    results = run_benchmark(database, list(names or scenarios), requests, warmup, seed, cache)
+
+    for name, result in results["scenarios"].items():
+        echo(
+            f"{name:<12} {result['rps']:>8.1f} req/s "
+            + " ".join(f"p{p} {result[f'p{p}'] * 1000:>8.2f}ms" for p in percentiles)
+            + f" rss {result['peak_rss'] / 2**20:>7.1f}MiB"
+            + (f" errors {result['errors']}" if result["errors"] else "")
+        )
+
+    if output:
+        output.write_bytes(dumps(results, option=OPT_INDENT_2))
+
+
+@main.command("compare")
+@argument("baseline", type=PathClick(exists=True, dir_okay=False, path_type=Path))
+@argument("current", type=PathClick(exists=True, dir_okay=False, path_type=Path))
+def compare(baseline: Path, current: Path):
+    results_a, results_b = loads(baseline.read_bytes()), loads(current.read_bytes())
+    echo(f"{results_a['commit'] or baseline.name} -> {results_b['commit'] or current.name}")
+
+    for name in results_a["scenarios"].keys() & results_b["scenarios"].keys():
+        a, b = results_a["scenarios"][name], results_b["scenarios"][name]
+        echo(
+            f"{name:<12} "
+            + " ".join(f"p{p} {(b[f'p{p}'] / a[f'p{p}'] - 1) * 100 if a[f'p{p}'] else 0:>+7.1f}%" for p in percentiles)
+            + f" rss {(b['peak_rss'] / a['peak_rss'] - 1) * 100 if a['peak_rss'] else 0:>+7.1f}%"
+        )
+
+
+@main.command("sqlite")
+@argument("database", type=PathClick(exists=True, dir_okay=False, resolve_path=True, path_type=Path))
+@option("--profile", "profiles", type=Choice(list(tuning_profiles)), multiple=True, help="Profiles [default: all]")
+@option(
+    "--scenario", "names", type=Choice(list(scenarios)), multiple=True, help="Scenarios [default: search, submission]"
+)
+@option("--requests", type=IntRange(1), default=200, show_default=True)
+@option("--warmup", type=IntRange(0), default=20, show_default=True)
+@option("--seed", type=int, default=0, show_default=True)
+@option("--output", type=PathClick(dir_okay=False, writable=True, path_type=Path), default=None)
+def sqlite(
+    database: Path,
+    profiles: tuple[str],
+    names: tuple[str],
+    requests: int,
+    warmup: int,
+    seed: int,
+    output: Path | None,
+):
+    profiles = tuple(dict.fromkeys(("default", *(profiles or tuning_profiles))))
+    results = run_tuning_benchmark(database, list(profiles), list(names or tuning_scenarios), requests, warmup, seed)
+
+    for profile, result in results.items():
+        for name, scenario in result["scenarios"].items():
+            baseline: dict = results["default"]["scenarios"][name]
+            echo(
+                f"{profile:<12} {name:<12} "
+                + " ".join(f"p{p} {scenario[f'p{p}'] * 1000:>8.2f}ms" for p in percentiles[:2])
+                + " "
+                + " ".join(
+                    f"p{p} {(scenario[f'p{p}'] / baseline[f'p{p}'] - 1) * 100 if baseline[f'p{p}'] else 0:>+7.1f}%"
+                    for p in percentiles[:2]
+                )
+            )
+
+    if output:
+        output.write_bytes(dumps(results, option=OPT_INDENT_2))
+
+
+@main.command("imports")
+@option("--budget", metavar="MS", type=IntRange(1), default=100, show_default=True, help="Maximum import time.")
+@option("--runs", type=IntRange(1), default=5, show_default=True)
+def imports(budget: int, runs: int):
+    import_time, excluded_imports = check_imports(cli_module, runs)
+
+    echo(f"{cli_module:<28} {import_time:>8.1f}ms (budget {budget}ms)")
+    for module in excluded_imports:
+        echo(f"{module:<28} imported by the command line interface")
+
+    if import_time > budget or excluded_imports:
+        raise SystemExit(1)
+
+
+@main.command("useragents")
+@option("--iterations", type=IntRange(1), default=10000, show_default=True)
+def useragents(iterations: int):
+    results: dict[str, float] = benchmark_user_agents(iterations)
+    for name, time_ns in results.items():
+        echo(f"{name:<12} {time_ns:>10.1f}ns per request")
+    echo(f"{'speedup':<12} {results['regex'] / results['cached']:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+from contextlib import AsyncExitStack
+from typing import Any
+from urllib.parse import urlsplit
+
+from starlette.applications import Starlette
+
+
+class Response:
+    def __init__(self, status: int, headers: list[tuple[bytes, bytes]], body: bytes):
+        self.status: int = status
+        self.headers: dict[str, str] = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in headers}
+        self.body: bytes = body
+
+
+class ASGIClient:
+    def __init__(self, app: Starlette):
+        self.app: Starlette = app
+        self.state: dict[str, Any] = {}
+        self.stack: AsyncExitStack = AsyncExitStack()
+
+    async def __aenter__(self):
+        self.state.update(await self.stack.enter_async_context(self.app.router.lifespan_context(self.app)) or {})
+        return self
+
+    async def __aexit__(self, *_):
+        await self.stack.aclose()
+
+    async def request(self, method: str, url: str, headers: dict[str, str] | None = None, body: bytes = b""):
+        url_split = urlsplit(url)
+        scope: dict[str, Any] = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 50000),
+            "root_path": "",
+            "path": url_split.path,
+            "raw_path": url_split.path.encode(),
+            "query_string": url_split.query.encode(),
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()],
+            "state": self.state.copy(),
+        }
+        request_sent: bool = False
+        status: int = 0
+        response_headers: list[tuple[bytes, bytes]] = []
+        chunks: list[bytes] = []
+
+        async def receive() -> dict[str, Any]:
+            nonlocal request_sent
+            if request_sent:
+                return {"type": "http.disconnect"}
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message: dict[str, Any]):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+
+        return Response(status, response_headers, b"".join(chunks))
+
+    async def get(self, url: str, headers: dict[str, str] | None = None) -> Response:
+        return await self.request("GET", url, headers)
@@ -0,0 +1,176 @@
+from datetime import datetime
+from datetime import timedelta
+from io import BytesIO
+from os import PathLike
+from pathlib import Path
+from random import Random
+
+from falocalrepo_database import Database
+from falocalrepo_database.tables import submissions_table
+from PIL import Image
+
+words: list[str] = (
+    "cat dog fox wolf otter dragon bird fish mouse rabbit deer horse lion tiger bear raccoon skunk ferret lynx hyena "
+    "forest river mountain beach city night morning winter summer autumn spring rain snow sun moon star cloud storm "
+    "portrait sketch painting comic animation commission trade gift request practice study doodle lineart colour "
+    "happy sad cute cozy dark bright soft sharp quick slow little big old new red blue green yellow purple orange"
+).split()
+species: list[str] = ["Fox", "Wolf", "Cat", "Dog", "Dragon", "Otter", "Rabbit", "Deer", "Bird", "Unspecified / Any"]
+categories: list[str] = ["Artwork (Digital)", "Artwork (Traditional)", "Story", "Poetry", "Music", "Photography"]
+genders: list[str] = ["Male", "Female", "Multiple characters", "Other / Not Specified", "Any"]
+ratings: list[str] = ["General", "General", "General", "Mature", "Adult"]
+folders: list[str] = ["gallery", "gallery", "gallery", "scraps"]
+
+
+def sentence(rng: Random, n_min: int = 4, n_max: int = 16) -> str:
+    return " ".join(rng.choices(words, k=rng.randint(n_min, n_max))).capitalize() + "."
+
+
+def bbcode_description(rng: Random, usernames: list[str], paragraphs: int) -> str:
+    blocks: list[str] = []
+    for _ in range(paragraphs):
+        text: str = " ".join(sentence(rng) for _ in range(rng.randint(1, 5)))
+        match rng.randint(0, 7):
+            case 0:
+                text = f"[b]{text}[/b]"
+            case 1:
+                text = f"[i]{text}[/i] [color=#{rng.randrange(0x1000000):06x}]{sentence(rng)}[/color]"
+            case 2:
+                text = f"[quote]{text}[/quote]"
+            case 3:
+                text = f"{text} [url=https://example.com/{rng.choice(words)}]{rng.choice(words)}[/url]"
+            case 4:
+                text = f"{text} :icon{rng.choice(usernames)}: :link{rng.choice(usernames)}:"
+            case 5:
+                text = f"[center]{text}[/center]"
+            case 6:
+                text = f"[h2]{sentence(rng, 1, 3)}[/h2]\n{text}"
+        blocks.append(text)
+    return "\n\n".join(blocks)
+
+
+def image_file(rng: Random, width: int, height: int, file_format: str) -> bytes:
+    image: Image.Image = Image.linear_gradient("L").resize((width, height))
+    image = Image.merge(
+        "RGB",
+        [
+            image.point(lambda v, a=rng.randint(1, 4), b=rng.randrange(256): (v * a + b) % 256),
+            Image.effect_noise((max(1, width // 8), max(1, height // 8)), rng.randint(8, 64)).resize((width, height)),
+            image.rotate(rng.randrange(360), expand=False),
+        ],
+    )
+    buffer: BytesIO = BytesIO()
+    image.save(buffer, file_format, compress_level=1, quality=90)
+    return buffer.getvalue()
+
+
+def generate_archive(
+    folder: str | PathLike,
+    users: int,
+    submissions: int,
+    journals: int,
+    comments: int,
+    comments_depth: int,
+    image_size: tuple[int, int],
+    seed: int,
+) -> Path:
+    rng: Random = Random(seed)
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    database_path: Path = folder / "FA.db"
+
+    if database_path.exists():
+        raise FileExistsError(database_path)
+
+    usernames: list[str] = [f"{rng.choice(words)}{rng.choice(words)}{i}" for i in range(users)]
+    date_start: datetime = datetime(2012, 1, 1)
+
+    with Database(database_path, init=True) as database:
+        for username in usernames:
+            database.users.save_user(
+                {
+                    "USERNAME": username,
+                    "FOLDERS": set(rng.sample(["gallery", "scraps", "favorites", "journals"], rng.randint(1, 4))),
+                    "ACTIVE": rng.random() > 0.1,
+                    "USERPAGE": bbcode_description(rng, usernames, rng.randint(1, 4)),
+                }
+            )
+
+        for submission_id in range(1, submissions + 1):
+            text: bool = rng.random() < 0.15
+            file_format: str = rng.choice(["PNG", "JPEG"])
+            extension: str = "txt" if text else file_format.lower().replace("jpeg", "jpg")
+            database.submissions.save_submission(
+                {
+                    "ID": submission_id,
+                    "AUTHOR": rng.choice(usernames),
+                    "TITLE": sentence(rng, 1, 6).rstrip("."),
+                    "DATE": date_start + timedelta(minutes=submission_id * 97),
+                    "DESCRIPTION": bbcode_description(rng, usernames, rng.randint(1, 8)),
+                    "FOOTER": "",
+                    "TAGS": sorted(set(rng.choices(words, k=rng.randint(0, 24)))),
+                    "CATEGORY": "Story" if text else rng.choice(categories),
+                    "SPECIES": rng.choice(species),
+                    "GENDER": rng.choice(genders),
+                    "RATING": rng.choice(ratings),
+                    "TYPE": "text" if text else "image",
+                    "FILEURL": [f"https://d.furaffinity.net/art/{submission_id}.{extension}"],
+                    "FAVORITE": set(rng.sample(usernames, min(len(usernames), rng.randint(0, 8)))),
+                    "MENTIONS": set(rng.sample(usernames, min(len(usernames), rng.randint(0, 2)))),
+                    "FOLDER": rng.choice(folders),
+                    "USERUPDATE": rng.random() > 0.5,
+                },
+                [
+                    (
+                        "\n\n".join(sentence(rng, 8, 40) for _ in range(rng.randint(20, 200))).encode()
+                        if text
+                        else image_file(rng, *image_size, file_format)
+                    )
+                ],
+                image_file(rng, 200, 200 * image_size[1] // image_size[0], "JPEG") if rng.random() < 0.5 else None,
+            )
+
+        for journal_id in range(1, journals + 1):
+            database.journals.save_journal(
+                {
+                    "ID": journal_id,
+                    "AUTHOR": rng.choice(usernames),
+                    "TITLE": sentence(rng, 1, 6).rstrip("."),
+                    "DATE": date_start + timedelta(minutes=journal_id * 331),
+                    "CONTENT": bbcode_description(rng, usernames, rng.randint(1, 12)),
+                    "HEADER": "",
+                    "FOOTER": "",
+                    "MENTIONS": set(rng.sample(usernames, min(len(usernames), rng.randint(0, 2)))),
+                    "USERUPDATE": rng.random() > 0.5,
+                }
+            )
+
+        comment_id: int = 0
+        parent_id: int = 0
+        while comment_id < comments and submissions:
+            parent_id = parent_id % submissions + 1
+            thread: list[int] = []
+            for _ in range(rng.randint(1, 4)):
+                reply_to: int | None = None
+                for _ in range(rng.randint(1, comments_depth)):
+                    if comment_id >= comments:
+                        break
+                    comment_id += 1
+                    database.comments.save_comment(
+                        {
+                            "ID": comment_id,
+                            "PARENT_TABLE": submissions_table,
+                            "PARENT_ID": parent_id,
+                            "REPLY_TO": reply_to,
+                            "AUTHOR": rng.choice(usernames),
+                            "DATE": date_start + timedelta(minutes=parent_id * 97 + comment_id),
+                            "TEXT": bbcode_description(rng, usernames, rng.randint(1, 2)),
+                        }
+                    )
+                    thread.append(comment_id)
+                    reply_to = comment_id if rng.random() < 0.7 else rng.choice(thread)
+
+        database.history.add_event("benchmark archive")
+        database.commit()
+
+    return database_path
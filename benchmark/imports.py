@@ -0,0 +1,40 @@
+from statistics import median
+from subprocess import run
+from sys import executable
+
+cli_module: str = "falocalrepo_server.__main__"
+cli_excluded_modules: tuple[str, ...] = (
+    "falocalrepo_server.server",
+    "falocalrepo_server.database",
+    "falocalrepo_database",
+    "starlette",
+    "uvicorn",
+    "jinja2",
+    "PIL",
+    "bs4",
+    "lxml",
+    "chardet",
+    "bbcode",
+)
+
+
+def import_times(module: str) -> dict[str, int]:
+    process = run([executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True)
+    process.check_returncode()
+    times: dict[str, int] = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def check_imports(module: str, runs: int) -> tuple[float, list[str]]:
+    samples: list[dict[str, int]] = [import_times(module) for _ in range(runs)]
+    package: str = module.split(".")[0]
+    return (
+        median(s.get(package, s.get(module, 0)) for s in samples) / 1000,
+        sorted({m for s in samples for m in s if m.split(".")[0] in cli_excluded_modules or m in cli_excluded_modules}),
+    )
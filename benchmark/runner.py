@@ -0,0 +1,134 @@
+from asyncio import run
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from platform import platform
+from platform import python_version
+from statistics import fmean
+from subprocess import DEVNULL
+from subprocess import CalledProcessError
+from subprocess import check_output
+from sys import platform as sys_platform
+from time import perf_counter
+from typing import Any
+
+from falocalrepo_server.server import make_app
+from falocalrepo_server.tuning import SQLiteTuning
+
+from .client import ASGIClient
+from .scenarios import scenario_urls
+
+percentiles: list[int] = [50, 90, 95, 99]
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0
+    values = sorted(values)
+    rank: float = (len(values) - 1) * p / 100
+    low: int = int(rank)
+    high: int = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def peak_rss() -> int:
+    try:
+        from resource import getrusage
+        from resource import RUSAGE_SELF
+
+        return getrusage(RUSAGE_SELF).ru_maxrss * (1 if sys_platform == "darwin" else 1024)
+    except ImportError:
+        from psutil import Process
+
+        return Process().memory_info().peak_wset
+
+
+def git_commit() -> str | None:
+    try:
+        return check_output(["git", "rev-parse", "HEAD"], stderr=DEVNULL, cwd=Path(__file__).parent).decode().strip()
+    except (CalledProcessError, OSError):
+        return None
+
+
+async def run_urls(
+    database_path: Path,
+    urls: list[str],
+    warmup: int,
+    use_cache: bool,
+    sqlite_tuning: SQLiteTuning | None = None,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors: int = 0
+    size: int = 0
+
+    app = make_app(database_path, "http://localhost", use_cache=use_cache, sqlite_tuning=sqlite_tuning)
+    async with ASGIClient(app) as client:
+        for url in urls[:warmup]:
+            await client.get(url)
+        time_start: float = perf_counter()
+        for url in urls[warmup:]:
+            request_start: float = perf_counter()
+            response = await client.get(url)
+            latencies.append(perf_counter() - request_start)
+            errors += response.status >= 400
+            size += len(response.body)
+        elapsed: float = perf_counter() - time_start
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "bytes": size,
+        "elapsed": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0,
+        "mean": fmean(latencies) if latencies else 0,
+        **{f"p{p}": percentile(latencies, p) for p in percentiles},
+        "max": max(latencies, default=0),
+    }
+
+
+def run_scenario(
+    database_path: Path,
+    name: str,
+    requests: int,
+    warmup: int,
+    seed: int,
+    use_cache: bool,
+    sqlite_tuning: SQLiteTuning | None = None,
+):
+    urls: list[str] = scenario_urls(database_path, name, seed, warmup + requests)
+    result: dict[str, Any] = run(run_urls(database_path, urls, warmup, use_cache, sqlite_tuning))
+    return result | {"peak_rss": peak_rss()}
+
+
+def run_benchmark(
+    database_path: Path,
+    names: list[str],
+    requests: int,
+    warmup: int,
+    seed: int,
+    use_cache: bool,
+    sqlite_tuning: SQLiteTuning | None = None,
+) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+
+    for name in names:
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+            results[name] = executor.submit(
+                run_scenario, database_path, name, requests, warmup, seed, use_cache, sqlite_tuning
+            ).result()
+
+    return {
+        "commit": git_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": python_version(),
+        "platform": platform(),
+        "database": str(database_path),
+        "database_size": database_path.stat().st_size,
+        "requests": requests,
+        "warmup": warmup,
+        "seed": seed,
+        "cache": use_cache,
+        "sqlite_tuning": sqlite_tuning._asdict() if sqlite_tuning else None,
+        "scenarios": results,
+    }
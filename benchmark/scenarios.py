@@ -0,0 +1,74 @@
+from pathlib import Path
+from random import Random
+from sqlite3 import Connection
+from sqlite3 import connect
+from typing import Callable
+from urllib.parse import quote
+
+search_queries: list[str] = [
+    "",
+    "cat",
+    "cat dog",
+    "cat | dog",
+    "(fox | wolf) !dragon",
+    "@tags |fox|",
+    "@rating general @species fox",
+    "@title ^the",
+    "@date ^2015",
+]
+
+
+def sample(conn: Connection, sql: str, rng: Random, k: int) -> list:
+    values: list = [v for [v] in conn.execute(sql)]
+    return rng.choices(values, k=k) if values else []
+
+
+def search_urls(_conn: Connection, rng: Random, k: int) -> list[str]:
+    urls: list[str] = []
+    for _ in range(k):
+        query: str = rng.choice(search_queries)
+        sort: str = rng.choice(["id", "date", "title"] + (["relevance"] if query else []))
+        page: int = rng.choice([1, 1, 1, 2, 11])
+        urls.append(f"/submissions?query={quote(query)}&sort={sort}&order=desc&page={page}&limit=48")
+    return urls
+
+
+def submission_urls(conn: Connection, rng: Random, k: int) -> list[str]:
+    return [f"/submission/{i}" for i in sample(conn, "select ID from SUBMISSIONS", rng, k)]
+
+
+def journal_urls(conn: Connection, rng: Random, k: int) -> list[str]:
+    return [f"/journal/{i}" for i in sample(conn, "select ID from JOURNALS", rng, k)]
+
+
+def user_urls(conn: Connection, rng: Random, k: int) -> list[str]:
+    return [f"/user/{quote(u)}" for u in sample(conn, "select USERNAME from USERS", rng, k)]
+
+
+def thumbnail_urls(conn: Connection, rng: Random, k: int) -> list[str]:
+    return [
+        f"/submission/{i}/thumbnail{rng.choice(['', '/150x', '/400x', '/x300'])}"
+        for i in sample(conn, "select ID from SUBMISSIONS where TYPE = 'image'", rng, k)
+    ]
+
+
+def zip_urls(conn: Connection, rng: Random, k: int) -> list[str]:
+    return [f"/submission/{i}/zip" for i in sample(conn, "select ID from SUBMISSIONS", rng, k)]
+
+
+scenarios: dict[str, Callable[[Connection, Random, int], list[str]]] = {
+    "search": search_urls,
+    "submission": submission_urls,
+    "journal": journal_urls,
+    "user": user_urls,
+    "thumbnail": thumbnail_urls,
+    "zip": zip_urls,
+}
+
+
+def scenario_urls(database_path: Path, name: str, seed: int, k: int) -> list[str]:
+    conn: Connection = connect(database_path.as_uri() + "?mode=ro", uri=True)
+    try:
+        return scenarios[name](conn, Random(f"{seed}:{name}"), k)
+    finally:
+        conn.close()
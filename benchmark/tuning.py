@@ -0,0 +1,48 @@
+from pathlib import Path
+from sqlite3 import Connection
+from sqlite3 import connect
+from typing import Any
+
+from falocalrepo_server.tuning import SQLiteTuning
+
+from .runner import run_benchmark
+
+tuning_profiles: dict[str, SQLiteTuning | None] = {
+    "default": None,
+    "mmap": SQLiteTuning(mmap_mb=2048),
+    "cache": SQLiteTuning(cache_mb=256),
+    "temp_store": SQLiteTuning(temp_store_memory=True),
+    "wal": SQLiteTuning(wal=True),
+    "all": SQLiteTuning(mmap_mb=2048, cache_mb=256, temp_store_memory=True, wal=True),
+}
+tuning_scenarios: list[str] = ["search", "submission"]
+
+
+def journal_mode(database_path: Path, mode: str | None = None) -> str:
+    conn: Connection = connect(database_path)
+    try:
+        return conn.execute(f"pragma journal_mode{f' = {mode}' if mode else ''}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def run_tuning_benchmark(
+    database_path: Path,
+    profiles: list[str],
+    names: list[str],
+    requests: int,
+    warmup: int,
+    seed: int,
+) -> dict[str, Any]:
+    mode: str = journal_mode(database_path)
+    results: dict[str, Any] = {}
+
+    try:
+        for profile in profiles:
+            results[profile] = run_benchmark(
+                database_path, names, requests, warmup, seed, False, tuning_profiles[profile]
+            )
+    finally:
+        journal_mode(database_path, mode)
+
+    return results
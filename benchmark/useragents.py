@@ -0,0 +1,42 @@
+from re import compile as re_compile
+from re import IGNORECASE
+from time import perf_counter_ns
+from typing import Callable
+
+from falocalrepo_server.useragent import is_user_agent_mobile
+from falocalrepo_server.useragent import mobile_user_agent_regex_a
+from falocalrepo_server.useragent import mobile_user_agent_regex_b
+
+user_agents: tuple[str, ...] = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (iPad; CPU OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15",
+    "SAMSUNG-SGH-E250/1.0 Profile/MIDP-2.0 Configuration/CLDC-1.1 UP.Browser/6.2.3.3.c.1.101 (GUI) MMP/2.0",
+    "curl/8.4.0",
+)
+
+
+def regex_classifier() -> Callable[[str], bool]:
+    pattern_a = re_compile(mobile_user_agent_regex_a, IGNORECASE)
+    pattern_b = re_compile(mobile_user_agent_regex_b, IGNORECASE)
+    return lambda user_agent: bool(pattern_a.search(user_agent) or pattern_b.search(user_agent[:4]))
+
+
+def time_per_call(classify: Callable[[str], bool], iterations: int) -> float:
+    time_start: int = perf_counter_ns()
+    for _ in range(iterations):
+        for user_agent in user_agents:
+            classify(user_agent)
+    return (perf_counter_ns() - time_start) / (iterations * len(user_agents))
+
+
+def benchmark_user_agents(iterations: int) -> dict[str, float]:
+    regex: Callable[[str], bool] = regex_classifier()
+    assert all(regex(ua) == is_user_agent_mobile(ua) for ua in user_agents)
+    return {
+        "regex": time_per_call(regex, iterations),
+        "cached": time_per_call(is_user_agent_mobile, iterations),
+    }
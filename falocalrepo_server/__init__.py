@@ -1,3 +1,11 @@
-from .server import server
 from .__main__ import main as app
 from .__version__ import __version__
+
+
+def __getattr__(name: str):
+    if name == "server":
+        from .server import server
+
+        globals()["server"] = server
+        return server
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -13,10 +13,8 @@ from click import option
 from click import pass_context
 from click.core import ParameterSource
 from click_help_colors import HelpColorsCommand
-from falocalrepo_database import Database
 
 from .__version__ import __version__
-from .server import server
 
 __prog__name__ = __package__.replace("_", "-")
 _yellow: str = "\x1b[33m"
@@ -33,13 +31,29 @@ class CustomHelpColorsCommand(HelpColorsCommand):
 def database_callback(ctx: Context, param: Parameter, value: Path) -> Path | None:
     if ctx.params.get("redirect_http", None):
         return value
+    elif ctx.params.get("snapshot", None) and value is not None:
+        return value
     elif value is None:
         raise UsageError(f"Missing argument {param.name.upper()!r}.", ctx)
-    elif ps := Database.check_connection(value, raise_for_error=False):
+
+    from falocalrepo_database import Database
+
+    if ps := Database.check_connection(value, raise_for_error=False):
         raise BadParameter(f"Multiple connections to database {str(value)!r}: {ps}", ctx, param)
     return value
 
 
+def auth_ignore_callback(ctx: Context, param: Parameter, value: tuple[str, ...]) -> tuple[str, ...]:
+    from .auth import ip_networks_from_pattern
+
+    for pattern in value:
+        try:
+            ip_networks_from_pattern(pattern)
+        except ValueError as err:
+            raise BadParameter(str(err), ctx, param)
+    return value
+
+
 def port_callback(ctx: Context, param: Parameter, value: str) -> int | None:
     if ctx.get_parameter_source(param.name) == ParameterSource.DEFAULT:
         return None
@@ -99,7 +113,7 @@ def docstring_format(*args, **kwargs):
 @option(
     "--redirect-http",
     metavar="PORT2",
-    type=int,
+    type=str,
     default=None,
     callback=port_callback,
     is_eager=True,
@@ -117,12 +131,50 @@ def docstring_format(*args, **kwargs):
     metavar="<IP>",
     type=str,
     multiple=True,
-    help=f"Ignore authentication for IP addresses. [multiple]",
+    callback=auth_ignore_callback,
+    help=f"Ignore authentication for IP addresses, networks (CIDR), or wildcards (e.g. 192.168.*.*). [multiple]",
 )
 @option("--editor", type=str, multiple=True, help="Users with editing rights.")
 @option("--max-results", type=IntRange(1000), default=None, help="Maximum number of results from queries.")
 @option("--cache/--no-cache", is_flag=True, default=True, help="Use cache.")
 @option("--browser/--no-browser", "browser", is_flag=True, default=True, help="Open browser on startup.")
+@option("--timing", is_flag=True, default=False, help="Add Server-Timing headers and log request timings.")
+@option(
+    "--slow-query-time",
+    metavar="MS",
+    type=IntRange(0),
+    default=500,
+    show_default=True,
+    help="Record queries slower than MS milliseconds.",
+)
+@option("--file-index", is_flag=True, default=False, help="Keep an index of submission files next to the database.")
+@option(
+    "--stats-counters",
+    is_flag=True,
+    default=False,
+    help="Keep table row counters in the database for the home page statistics.",
+)
+@option(
+    "--snapshot",
+    metavar="SECONDS",
+    type=IntRange(1),
+    default=None,
+    is_eager=True,
+    help="Serve a read-only snapshot of the database refreshed every SECONDS.",
+)
+@option(
+    "--sqlite-mmap", metavar="MB", type=IntRange(0), default=0, help="Memory-map up to MB megabytes of the database."
+)
+@option("--sqlite-cache-mb", metavar="MB", type=IntRange(0), default=0, help="SQLite page cache size in megabytes.")
+@option("--sqlite-temp-memory", is_flag=True, default=False, help="Keep SQLite temporary tables and indices in memory.")
+@option("--sqlite-wal", is_flag=True, default=False, help="Switch the database to write-ahead logging.")
+@option(
+    "--sqlite-optimize",
+    metavar="SECONDS",
+    type=IntRange(0),
+    default=0,
+    help="Run PRAGMA optimize every SECONDS.",
+)
 @option(
     "--color/--no-color",
     is_flag=True,
@@ -149,6 +201,16 @@ def main(
     max_results: int | None,
     cache: bool,
     browser: bool,
+    timing: bool,
+    slow_query_time: int,
+    file_index: bool,
+    stats_counters: bool,
+    snapshot: int | None,
+    sqlite_mmap: int,
+    sqlite_cache_mb: int,
+    sqlite_temp_memory: bool,
+    sqlite_wal: bool,
+    sqlite_optimize: int,
 ):
     """
     Start a server at {yellow}HOST{reset}:{yellow}PORT{reset} to navigate the database at {yellow}DATABASE{reset}. The
@@ -181,6 +243,18 @@ def main(
             next(_p for _p in ctx.command.params if _p.name == "redirect_http"),
         )
 
+    if redirect_http:
+        from .redirect import redirect
+
+        return redirect(host, port or 80, redirect_http)
+
+    from .server import server
+    from .tuning import SQLiteTuning
+
+    sqlite_tuning: SQLiteTuning = SQLiteTuning(
+        sqlite_mmap, sqlite_cache_mb, sqlite_temp_memory, sqlite_wal, sqlite_optimize
+    )
+
     server(
         database or Path(),
         host,
@@ -193,6 +267,12 @@ def main(
         max_results,
         cache,
         browser,
+        timing,
+        slow_query_time / 1000,
+        file_index,
+        snapshot,
+        sqlite_tuning if any(sqlite_tuning) else None,
+        stats_counters,
     )
 
 
@@ -0,0 +1,149 @@
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from functools import lru_cache
+from hashlib import sha256
+from hmac import compare_digest
+from hmac import new as hmac_new
+from ipaddress import IPv4Network
+from ipaddress import IPv6Network
+from ipaddress import ip_address
+from ipaddress import ip_network
+from time import time
+from typing import Any
+
+from orjson import dumps
+from orjson import loads
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+session_max_age: int = 14 * 24 * 60 * 60
+auth_token_max_age: int = session_max_age
+
+
+def auth_secret(authentication: tuple[tuple[str, str], ...]) -> bytes:
+    return sha256("\0".join(":".join(a) for a in authentication).encode()).hexdigest().encode()
+
+
+def ip_networks_from_pattern(pattern: str) -> list[IPv4Network | IPv6Network]:
+    if pattern == "*":
+        return [ip_network("0.0.0.0/0"), ip_network("::/0")]
+    try:
+        return [ip_network(pattern, strict=False)]
+    except ValueError:
+        pass
+    octets: list[str] = pattern.split(".")
+    prefix: int = next((i for i, o in enumerate(octets) if o == "*"), len(octets))
+    if len(octets) > 4 or prefix == len(octets) or any(o != "*" for o in octets[prefix:]):
+        raise ValueError(f"{pattern!r} is not a valid IP address, network, or wildcard")
+    try:
+        return [ip_network(".".join([*octets[:prefix], *["0"] * (4 - prefix)]) + f"/{prefix * 8}")]
+    except ValueError:
+        raise ValueError(f"{pattern!r} is not a valid IP address, network, or wildcard")
+
+
+class IPAllowlist:
+    def __init__(self, patterns: tuple[str, ...] | None):
+        self.networks: list[IPv4Network | IPv6Network] = [
+            n for p in patterns or [] for n in ip_networks_from_pattern(p)
+        ]
+        self.allowed = lru_cache(maxsize=4096)(self._allowed)
+
+    def __bool__(self) -> bool:
+        return bool(self.networks)
+
+    def _allowed(self, host: str | None) -> bool:
+        try:
+            address = ip_address(host or "")
+        except ValueError:
+            return False
+        address = getattr(address, "ipv4_mapped", None) or address
+        return any(address in network for network in self.networks)
+
+
+class AuthToken:
+    def __init__(self, secret: bytes, max_age: int):
+        self.secret: bytes = secret
+        self.max_age: int = max_age
+
+    def signature(self, payload: str) -> str:
+        return hmac_new(self.secret, payload.encode(), sha256).hexdigest()
+
+    def sign(self, username: str) -> str:
+        payload: str = f"{urlsafe_b64encode(username.encode()).decode()}.{int(time()) + self.max_age}"
+        return f"{payload}.{self.signature(payload)}"
+
+    def verify(self, token: str) -> tuple[str, int] | None:
+        if not isinstance(token, str):
+            return None
+        payload, _, signature = token.rpartition(".")
+        if not payload or not compare_digest(signature, self.signature(payload)):
+            return None
+        username, _, expires = payload.partition(".")
+        if not expires.isdigit() or (remaining := int(expires) - int(time())) <= 0:
+            return None
+        return urlsafe_b64decode(username).decode(), remaining
+
+
+class SessionCookieMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        session_cookie: str,
+        secret_key: bytes,
+        max_age: int = session_max_age,
+        https_only: bool = False,
+    ):
+        self.app: ASGIApp = app
+        self.session_cookie: str = session_cookie
+        self.secret_key: bytes = secret_key
+        self.cookie_flags: str = f"path=/; Max-Age={max_age}; httponly; samesite=lax" + (
+            "; secure" if https_only else ""
+        )
+
+    def signature(self, payload: str) -> str:
+        return hmac_new(self.secret_key, payload.encode(), sha256).hexdigest()
+
+    def dump(self, session: dict[str, Any]) -> str:
+        payload: str = urlsafe_b64encode(dumps(session)).decode()
+        return f"{payload}.{self.signature(payload)}"
+
+    def load(self, scope: Scope) -> dict[str, Any]:
+        cookie: bytes = next((v for k, v in scope["headers"] if k == b"cookie"), b"")
+        if not (value := cookie_parser(cookie.decode("latin-1")).get(self.session_cookie)):
+            return {}
+        payload, _, signature = value.rpartition(".")
+        if not payload or not compare_digest(signature, self.signature(payload)):
+            return {}
+        try:
+            session = loads(urlsafe_b64decode(payload))
+            return session if isinstance(session, dict) else {}
+        except ValueError:
+            return {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        initial_session: dict[str, Any] = self.load(scope)
+        scope["session"] = initial_session.copy()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and scope["session"] != initial_session:
+                headers: MutableHeaders = MutableHeaders(scope=message)
+                if scope["session"]:
+                    headers.append(
+                        "Set-Cookie", f"{self.session_cookie}={self.dump(scope['session'])}; {self.cookie_flags}"
+                    )
+                else:
+                    headers.append(
+                        "Set-Cookie",
+                        f"{self.session_cookie}=null; expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.cookie_flags}",
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
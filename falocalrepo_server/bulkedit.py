@@ -0,0 +1,111 @@
+from sqlite3 import Connection
+from typing import Any
+from typing import Iterator
+from typing import TypedDict
+
+from falocalrepo_database.tables import JournalsColumns
+from falocalrepo_database.tables import SubmissionsColumns
+from falocalrepo_database.tables import journals_table
+from falocalrepo_database.tables import submissions_table
+
+bulk_edit_chunk_size: int = 500
+bulk_edit_fields: dict[str, set[str]] = {
+    submissions_table: {"add_tags", "remove_tags", "folder", "rating", "author"},
+    journals_table: {"author"},
+}
+
+
+class BulkPatch(TypedDict, total=False):
+    add_tags: list[str]
+    remove_tags: list[str]
+    folder: str
+    rating: str
+    author: str
+
+
+def parse_bulk_patch(table_name: str, obj: Any) -> BulkPatch:
+    if (fields := bulk_edit_fields.get(table_name.upper())) is None:
+        raise ValueError(f"Bulk edits are not supported for {table_name.lower()}")
+    elif not isinstance(obj, dict) or not obj:
+        raise ValueError("Patch must be a non-empty object")
+    elif unknown := obj.keys() - fields:
+        raise ValueError(f"Unknown patch fields: {', '.join(sorted(unknown))}")
+
+    patch: BulkPatch = {}
+    for field in ("add_tags", "remove_tags"):
+        if field not in obj:
+            continue
+        elif not isinstance(tags := obj[field], list) or not all(isinstance(t, str) for t in tags):
+            raise ValueError(f"{field} must be a list of strings")
+        elif any(not t.strip() or "|" in t or " " in t.strip() for t in tags):
+            raise ValueError(f"{field} contains an invalid tag")
+        patch[field] = [t.strip() for t in tags]
+    for field in ("folder", "rating", "author"):
+        if field not in obj:
+            continue
+        elif not isinstance(value := obj[field], str) or not value.strip():
+            raise ValueError(f"{field} must be a non-empty string")
+        patch[field] = value.strip()
+    if patch.get("folder", "gallery").lower() not in ("gallery", "scraps"):
+        raise ValueError("folder must be one of gallery, scraps")
+
+    return patch
+
+
+def apply_bulk_patch(patch: BulkPatch, row: dict[str, Any]) -> dict[str, Any]:
+    new_row: dict[str, Any] = row.copy()
+    if "add_tags" in patch or "remove_tags" in patch:
+        tags: list[str] = SubmissionsColumns.TAGS.from_entry(row[SubmissionsColumns.TAGS.name])
+        tags = [t for t in tags if t not in patch.get("remove_tags", [])]
+        tags.extend(t for t in dict.fromkeys(patch.get("add_tags", [])) if t not in tags)
+        new_row[SubmissionsColumns.TAGS.name] = SubmissionsColumns.TAGS.to_entry(tags)
+    if "folder" in patch:
+        new_row[SubmissionsColumns.FOLDER.name] = SubmissionsColumns.FOLDER.to_entry(patch["folder"])
+    if "rating" in patch:
+        new_row[SubmissionsColumns.RATING.name] = patch["rating"]
+    if "author" in patch:
+        new_row[SubmissionsColumns.AUTHOR.name] = patch["author"]
+    return new_row
+
+
+def bulk_edit(
+    connection: Connection,
+    table_name: str,
+    ids: list[int],
+    patch: BulkPatch,
+    chunk_size: int = bulk_edit_chunk_size,
+) -> Iterator[tuple[int, int]]:
+    columns: list[str]
+    if (table_name := table_name.upper()) == submissions_table:
+        columns = [
+            SubmissionsColumns.AUTHOR.name,
+            SubmissionsColumns.TAGS.name,
+            SubmissionsColumns.FOLDER.name,
+            SubmissionsColumns.RATING.name,
+        ]
+    else:
+        columns = [JournalsColumns.AUTHOR.name]
+
+    changed: int = 0
+    try:
+        for n in range(0, len(ids), chunk_size):
+            chunk: list[int] = ids[n : n + chunk_size]
+            rows: list[tuple] = connection.execute(
+                f"select ID, {', '.join(columns)} from {table_name} where ID in ({', '.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            updates: list[list[Any]] = [
+                [*new_row.values(), row_id]
+                for row_id, *values in rows
+                if (new_row := apply_bulk_patch(patch, row := dict(zip(columns, values)))) != row
+            ]
+            connection.executemany(
+                f"update {table_name} set {', '.join(f'{c} = ?' for c in columns)} where ID = ?", updates
+            )
+            changed += len(updates)
+            if n + chunk_size >= len(ids):
+                connection.commit()
+            yield n + len(chunk), changed
+    except BaseException:
+        connection.rollback()
+        raise
@@ -0,0 +1,40 @@
+from codecs import BOM_UTF16_BE
+from codecs import BOM_UTF16_LE
+from codecs import BOM_UTF8
+from codecs import IncrementalDecoder
+from codecs import getincrementaldecoder
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO
+
+from chardet import detect
+
+charset_sample_size: int = 32768
+
+
+def detect_charset(file: BinaryIO) -> str:
+    sample: bytes = file.read(charset_sample_size)
+    if sample.startswith(BOM_UTF8):
+        return "utf-8-sig"
+    elif sample.startswith((BOM_UTF16_LE, BOM_UTF16_BE)):
+        return "utf-16"
+    decoder: IncrementalDecoder = getincrementaldecoder("utf-8")()
+    try:
+        chunk: bytes = sample
+        while chunk:
+            decoder.decode(chunk)
+            chunk = file.read(charset_sample_size)
+        decoder.decode(b"", True)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    return detect(sample)["encoding"] or ""
+
+
+@lru_cache(maxsize=4096)
+def file_charset(path: Path, size: int, mtime: float) -> str:
+    try:
+        with path.open("rb") as file:
+            return detect_charset(file)
+    except OSError:
+        return ""
@@ -0,0 +1,122 @@
+from array import array
+from sqlite3 import Cursor
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+from typing import Sequence
+
+columnar_fetch_size: int = 10000
+
+Column = array | list
+
+
+class ResultRow:
+    __slots__ = ("values", "columns", "index")
+
+    def __init__(self, values: tuple, columns: list[str], index: dict[str, int]):
+        self.values: tuple = values
+        self.columns: list[str] = columns
+        self.index: dict[str, int] = index
+
+    def __getitem__(self, key: int | str) -> Any:
+        return self.values[key if isinstance(key, int) else self.index[key.lower()]]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, ResultRow) and self.values == other.values
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}{self.values!r}"
+
+    def keys(self) -> list[str]:
+        return self.columns
+
+
+def extend_column(column: Column, values: Iterable[Any], strings: dict[str, str]) -> Column:
+    if isinstance(column, array):
+        size: int = len(column)
+        try:
+            column.extend(values)
+            return column
+        except (TypeError, OverflowError):
+            column = column[:size].tolist()
+    column.extend(strings.setdefault(v, v) if isinstance(v, str) else v for v in values)
+    return column
+
+
+class ColumnarRows(Sequence):
+    def __init__(self, columns: list[str], data: list[Column], reverse: bool = False):
+        self.columns: list[str] = columns
+        self.data: list[Column] = data
+        self.reverse: bool = reverse
+        self.index: dict[str, int] = {c.lower(): i for i, c in enumerate(columns)}
+
+    @classmethod
+    def from_cursor(cls, cursor: Cursor, size: int = columnar_fetch_size) -> "ColumnarRows":
+        cursor.row_factory = None
+        columns: list[str] = [d[0] for d in cursor.description]
+        data: list[Column] = [array("q") for _ in columns]
+        strings: dict[str, str] = {}
+        while chunk := cursor.fetchmany(size):
+            data = [extend_column(column, values, strings) for column, values in zip(data, zip(*chunk))]
+        return cls(columns, data)
+
+    def __len__(self) -> int:
+        return len(self.data[0]) if self.data else 0
+
+    def position(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        return len(self) - 1 - index if self.reverse else index
+
+    def row(self, position: int) -> ResultRow:
+        return ResultRow(tuple(column[position] for column in self.data), self.columns, self.index)
+
+    def __getitem__(self, index: int | slice) -> ResultRow | list[ResultRow]:
+        if isinstance(index, slice):
+            return [self.row(self.position(i)) for i in range(*index.indices(len(self)))]
+        return self.row(self.position(index))
+
+    def __iter__(self) -> Iterator[ResultRow]:
+        return (self.row(p) for p in (range(len(self) - 1, -1, -1) if self.reverse else range(len(self))))
+
+    def column(self, name: str) -> Column:
+        column: Column = self.data[self.index[name.lower()]]
+        return column[::-1] if self.reverse else column
+
+    def reversed(self) -> "ColumnarRows":
+        return ColumnarRows(self.columns, self.data, not self.reverse)
+
+    def without(self, column: str, values: Iterable[Any]) -> "ColumnarRows":
+        values = set(values)
+        keys: Column = self.data[self.index[column.lower()]]
+        if len(keep := [p for p, v in enumerate(keys) if v not in values]) == len(keys):
+            return self
+        data: list[Column] = [
+            array(c.typecode, (c[p] for p in keep)) if isinstance(c, array) else [c[p] for p in keep] for c in self.data
+        ]
+        return ColumnarRows(self.columns, data, self.reverse)
+
+    def insert(self, index: int, row: Sequence) -> "ColumnarRows":
+        position: int = len(self) - index if self.reverse else index
+        data: list[Column] = []
+        strings: dict[str, str] = {}
+        for column, value in zip(self.data, row):
+            column = column[:]
+            if isinstance(column, array):
+                try:
+                    column.insert(position, value)
+                    data.append(column)
+                    continue
+                except (TypeError, OverflowError):
+                    column = column.tolist()
+            column.insert(position, strings.setdefault(value, value) if isinstance(value, str) else value)
+            data.append(column)
+        return ColumnarRows(self.columns, data, self.reverse)
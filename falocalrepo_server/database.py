@@ -1,21 +1,32 @@
 from collections import namedtuple
+from contextlib import closing
 from datetime import datetime
+from datetime import timedelta
 from functools import lru_cache
+from functools import partial
 from os import PathLike
+from os import stat_result
 from pathlib import Path
 from re import match
 from re import split
 from re import sub
 from sqlite3 import Cursor, ProgrammingError
+from sqlite3 import DatabaseError
 from sqlite3 import Row
+from sqlite3 import connect
+from stat import S_IFREG
+from stat import S_ISREG
+from threading import Thread
+from time import perf_counter
 from types import GenericAlias
 from typing import Any
 from typing import Callable
+from typing import Iterable
 from typing import TypeVar
 from typing import TypedDict
 from typing import get_origin
 
-from chardet import detect as detect_encoding
+from falocalrepo_database import Cursor as FACursor
 from falocalrepo_database import Database as FADatabase
 from falocalrepo_database import Table
 from falocalrepo_database.tables import CommentsColumns
@@ -24,17 +35,46 @@ from falocalrepo_database.tables import SubmissionsColumns
 from falocalrepo_database.tables import UsersColumns
 from falocalrepo_database.tables import comments_table
 from falocalrepo_database.tables import journals_table
+from falocalrepo_database.tables import settings_table
 from falocalrepo_database.tables import submissions_table
 from falocalrepo_database.tables import users_table
 from falocalrepo_database.util import clean_username
+from falocalrepo_database.util import tiered_path
 from filetype import get_type
 from filetype import guess_mime
 from orjson import dumps
 from orjson import loads
 
+from falocalrepo_server.charset import file_charset
+from falocalrepo_server.columnar import ColumnarRows
+from falocalrepo_server.deletion import delete_rows
+from falocalrepo_server.facets import FacetIndex
+from falocalrepo_server.facets import facets_columns
+from falocalrepo_server.fileindex import FileEntry
+from falocalrepo_server.fileindex import FileIndex
 from falocalrepo_server.functions import bbcode_to_html
 from falocalrepo_server.functions import clean_html
 from falocalrepo_server.functions import prepare_html
+from falocalrepo_server.metrics import metrics
+from falocalrepo_server.querylog import SlowQueryLog
+from falocalrepo_server.ranking import relevance_sql
+from falocalrepo_server.reorder import reconcile_file_ext
+from falocalrepo_server.reorder import resume_reorder
+from falocalrepo_server.searchcache import ResultCache
+from falocalrepo_server.searchcache import SortKey
+from falocalrepo_server.searchcache import insert_sorted
+from falocalrepo_server.snapshot import Snapshot
+from falocalrepo_server.snapshot import source_version
+from falocalrepo_server.stats import install_stats
+from falocalrepo_server.stats import read_stats
+from falocalrepo_server.stats import recount_stats
+from falocalrepo_server.stats import stats_tables
+from falocalrepo_server.suggestions import SuggestionIndex
+from falocalrepo_server.suggestions import build_suggestion_index
+from falocalrepo_server.suggestions import suggestions_chunk_size
+from falocalrepo_server.timing import timer
+from falocalrepo_server.tuning import SQLiteTuning
+from falocalrepo_server.tuning import apply_tuning
 
 R = TypeVar("R")
 SearchResults = namedtuple(
@@ -50,6 +90,20 @@ SearchResults = namedtuple(
     ],
 )
 
+SearchQuery = namedtuple(
+    "SearchQuery",
+    [
+        "table",
+        "sql",
+        "values",
+        "columns",
+        "order",
+        "keys",
+        "keys_values",
+        "results",
+    ],
+)
+
 default_sort: dict[str, str] = {
     submissions_table: "date",
     journals_table: "date",
@@ -62,6 +116,26 @@ default_order: dict[str, str] = {
     users_table: "asc",
     comments_table: "desc",
 }
+search_alias_columns: dict[str, dict[str, str]] = {
+    submissions_table: {
+        "lower": SubmissionsColumns.AUTHOR.name,
+        "keywords": SubmissionsColumns.TAGS.name,
+        "message": SubmissionsColumns.DESCRIPTION.name,
+        "filename": SubmissionsColumns.FILEURL.name,
+    },
+    journals_table: {
+        "lower": JournalsColumns.AUTHOR.name,
+        "message": JournalsColumns.CONTENT.name,
+    },
+    users_table: {},
+    comments_table: {
+        "lower": CommentsColumns.AUTHOR.name,
+        "message": CommentsColumns.TEXT.name,
+    },
+}
+max_prefetched_submission_files: int = 4096
+sqlite_max_limit: int = 2**63 - 1
+text_preview_size: int = 1000
 
 
 class Settings(TypedDict):
@@ -83,6 +157,53 @@ def format_value(value: str, *, substring: bool = False) -> str:
     return value
 
 
+def query_tokens(query: str) -> list[str]:
+    query = sub(r"(^[&| ]+|((?<!\\)[&|]| )+$)", "", query)
+    query = sub(r"( *[&|])+(?= *[&|] *[@()])", "", query)
+    return [
+        t
+        for t in split(r'((?<!\\)"(?:[^"]|(?<=\\)")*"|(?<!\\)(?:[()&|]|%=|[=!]=|[<>]=?|!)|\s+)', query)
+        if t and t.strip()
+    ]
+
+
+def query_to_terms(
+    query: str,
+    default_field: str,
+    available_columns: list[str],
+    substring_columns: list[str] = None,
+    aliases: dict[str, str] = None,
+    alias_columns: dict[str, str] = None,
+) -> list[tuple[str, str]]:
+    substring_columns, aliases, alias_columns = substring_columns or [], aliases or {}, alias_columns or {}
+    terms: list[tuple[str, str]] = []
+    field: str = default_field.lower()
+    like: bool = default_field in substring_columns
+    scored: bool = True
+    negation: bool = False
+
+    for token in query_tokens(query):
+        if token == "%=":
+            like, scored = True, True
+        elif token in ("==", "!=", ">", ">=", "<", "<="):
+            scored = False
+        elif token == "!":
+            negation = True
+        elif token in ("&", "|", "(", ")"):
+            negation = False
+        elif m := match(r"^@(\w+)$", token):
+            field = m.group(1).lower()
+            if field not in available_columns and field not in aliases:
+                field = default_field
+            like, scored = field in substring_columns, True
+        else:
+            if scored and not negation:
+                terms.append((field, format_value(token, substring=like)))
+            negation = False
+
+    return [(alias_columns.get(field, field), value) for field, value in terms]
+
+
 def query_to_sql(
     query: str,
     default_field: str,
@@ -90,7 +211,6 @@ def query_to_sql(
     substring_columns: list[str] = None,
     lower_columns: list[str] = None,
     aliases: dict[str, str] = None,
-    score: bool = False,
 ) -> tuple[str, list[str]]:
     if not query:
         return "", []
@@ -98,20 +218,12 @@ def query_to_sql(
     sql_elements: list[str] = []
     values: list[str] = []
 
-    query = sub(r"(^[&| ]+|((?<!\\)[&|]| )+$)", "", query)
-    query = sub(r"( *[&|])+(?= *[&|] *[@()])", "", query)
-
     field, prev = default_field.lower(), ""
     exact: bool = False
     like: bool = default_field in substring_columns
     negation: bool = False
     comparison: int = 0
-    tokens: list[str] = [
-        t
-        for t in split(r'((?<!\\)"(?:[^"]|(?<=\\)")*"|(?<!\\)(?:[()&|]|%=|[=!]=|[<>]=?|!)|\s+)', query)
-        if t and t.strip()
-    ]
-    for token in tokens:
+    for token in query_tokens(query):
         if token == prev:
             continue
         elif token == "%=":
@@ -141,12 +253,12 @@ def query_to_sql(
         elif token == "&":
             if prev in ("", "&", "|", "("):
                 continue
-            sql_elements.append("and" if not score else "*")
+            sql_elements.append("and")
             negation = False
         elif token == "|":
             if prev in ("", "&", "|", "("):
                 continue
-            sql_elements.append("or" if not score else "+")
+            sql_elements.append("or")
             negation = False
         elif token in ("(", ")"):
             if token == ")" and prev == "(":
@@ -165,7 +277,7 @@ def query_to_sql(
             exact, like, comparison = False, field in substring_columns, 0
             continue
         elif token:
-            sql_elements.append("and" if not score else "*") if prev not in ("", "&", "|", "(") else None
+            sql_elements.append("and") if prev not in ("", "&", "|", "(") else None
             field_: str = aliases.get(field, field)
             if (exact or comparison) and field in lower_columns:
                 field_ = f"lower({field_})"
@@ -191,6 +303,25 @@ def query_to_sql(
     return sql, values
 
 
+def submission_files_paths(
+    files_folder: Path,
+    submission_id: int,
+    file_saved: int,
+    file_ext: list[str],
+) -> tuple[list[Path] | None, Path | None]:
+    if not file_saved:
+        return None, None
+    folder: Path = files_folder / tiered_path(submission_id)
+    return (
+        (
+            [folder / f"submission{n or ''}{('.' + ext) if ext else ''}" for n, ext in enumerate(file_ext)]
+            if file_saved & 0b10
+            else None
+        ),
+        folder / "thumbnail.jpg" if file_saved & 0b01 else None,
+    )
+
+
 def replies_count(comment: dict[str, Any]) -> int:
     return sum(map(replies_count, comment["REPLIES"]), len(comment["REPLIES"]))
 
@@ -204,12 +335,34 @@ def set_replies_count(comment: dict[str, Any]) -> dict[str, Any]:
 
 # noinspection DuplicatedCode,PyProtectedMember
 class Database:
-    def __init__(self, path: str | PathLike | None = None, use_cache: bool = True, max_results: int | None = None):
+    def __init__(
+        self,
+        path: str | PathLike | None = None,
+        use_cache: bool = True,
+        max_results: int | None = None,
+        slow_query_time: float | None = None,
+        snapshot: Snapshot | None = None,
+        tuning: SQLiteTuning | None = None,
+    ):
         self.path: Path | None = Path(path) if path else None
+        self.source: Path | None = self.path
+        self.snapshot: Snapshot | None = snapshot
+        if snapshot:
+            with snapshot.lock:
+                self.path = snapshot.path
+                snapshot.used = snapshot.generation
         self.use_cache: bool = use_cache
         self.max_results: int | None = max_results
+        self.slow_queries: SlowQueryLog | None = SlowQueryLog(slow_query_time) if slow_query_time is not None else None
+        self.tuning: SQLiteTuning | None = tuning
         self.database: FADatabase | None = None
-        self.m_time: int = self.path.stat().st_mtime_ns
+        self.version: tuple[int, int] | None = None
+        self.m_time: int = 0
+        self.stats_counters: bool = False
+        self.suggestions: SuggestionIndex | None = None
+        self.suggestions_thread: Thread | None = None
+        self.submission_files_prefetched: dict[int, tuple[list[Path] | None, Path | None]] = {}
+        self.file_index: FileIndex | None = None
 
     def __enter__(self):
         self.connect()
@@ -225,28 +378,104 @@ class Database:
         if path:
             self.path = self.path
         self.database = FADatabase(self.path)
+        self.database.execute = partial(self._execute, self.database.execute)
+        apply_tuning(
+            self.database.connection, self.tuning._replace(wal=False) if self.snapshot and self.tuning else self.tuning
+        )
+        self.version = self.read_version()
+        self.m_time = self.read_m_time()
         return self.database
 
     def close(self):
+        if self.file_index:
+            self.file_index.close()
         if self.database and self.database.is_open:
             self.database.close()
         del self.database
         self.database = None
+        if self.snapshot:
+            self.snapshot.stop()
+
+    def _execute(self, execute: Callable[..., Cursor], sql: str, parameters: Iterable | None = None) -> Cursor:
+        cursor: Cursor | None = None
+        time_start: float = perf_counter()
+        try:
+            cursor = execute(sql, parameters)
+            return cursor
+        finally:
+            duration: float = perf_counter() - time_start
+            metrics.observe_query(sql, duration)
+            if self.slow_queries and duration >= self.slow_queries.threshold:
+                self.slow_queries.observe(
+                    self.database.connection,
+                    datetime.now() - timedelta(seconds=duration),
+                    sql,
+                    parameters,
+                    duration,
+                    cursor.rowcount if cursor and cursor.rowcount >= 0 else None,
+                )
 
     def call_cached_method(self, func: Callable[..., R], *args: Any) -> R:
-        # noinspection PyUnresolvedReferences
-        return func(*args) if self.use_cache else func.__wrapped__(self, *args)
+        with timer(func.__name__.lstrip("_")):
+            # noinspection PyUnresolvedReferences
+            return func(*args) if self.use_cache else func.__wrapped__(self, *args)
+
+    def switch_snapshot(self):
+        with self.snapshot.lock:
+            generation: int = self.snapshot.generation
+            self.snapshot.used = generation
+        if self.database and self.database.is_open:
+            self.database.close()
+        self.database = None
+        self.path = self.snapshot.snapshot_path(generation)
+        self.connect()
+        self.suggestions = None
+        self._clear_cache.cache_clear()
+        self._clear_cache(self.version)
+
+    def read_version(self) -> tuple[int, int]:
+        return (
+            self.database.connection.execute("pragma data_version").fetchone()[0],
+            self.database.connection.total_changes,
+        )
+
+    def read_m_time(self) -> int:
+        return max(source_version(self.source)[::2])
 
     def clear_cache(self):
-        self._clear_cache(self.path.stat().st_mtime_ns)
+        if self.snapshot and self.snapshot.generation != self.snapshot.used:
+            self.switch_snapshot()
+        if (version := self.read_version()) != self.version:
+            self._clear_cache(version)
+        self.version = version
+
+    def invalidate_cache(self, *methods: Callable):
+        for method in methods:
+            # noinspection PyUnresolvedReferences
+            method.cache_clear()
+        if self.version and (version := self.read_version())[0] == self.version[0]:
+            self.version = version
+        self.m_time = self.read_m_time()
 
     @lru_cache(1)
-    def _clear_cache(self, m_time: int):
-        self.m_time = m_time
+    def _clear_cache(self, version: tuple[int, int]):
+        self.version = version
+        self.m_time = self.read_m_time()
+        self.submission_files_prefetched.clear()
+        if self.file_index:
+            self.file_index.forget_missing()
+        metrics.observe_cache_clear(self.cache_statistics())
         for attr_name in dir(self):
             if hasattr(getattr(self, attr_name), "cache_clear"):
                 self.__getattribute__(attr_name).cache_clear()
 
+    def cache_statistics(self) -> dict[str, tuple[int, int, int | None, int]]:
+        return {
+            attr_name.lstrip("_"): tuple(getattr(self, attr_name).cache_info())
+            for attr_name in dir(self)
+            if attr_name != "_clear_cache" and hasattr(getattr(self, attr_name), "cache_info")
+        }
+
     @lru_cache
     def _settings(self) -> Settings | None:
         settings: dict[str, dict[str, str | int]] = loads(self.database.settings["SERVER.SEARCH"] or "{}")
@@ -263,11 +492,12 @@ class Database:
 
     @lru_cache
     def _stats(self) -> tuple[int, int, int, int, datetime]:
+        counts: dict[str, int] = (read_stats(self.database) if self.stats_counters else None) or {}
         return (
-            len(self.database.users),
-            len(self.database.submissions),
-            len(self.database.journals),
-            len(self.database.comments),
+            counts[users_table] if users_table in counts else len(self.database.users),
+            counts[submissions_table] if submissions_table in counts else len(self.database.submissions),
+            counts[journals_table] if journals_table in counts else len(self.database.journals),
+            counts[comments_table] if comments_table in counts else len(self.database.comments),
             (
                 event["TIME"]
                 if (event := next(self.database.history.select(order=["time desc"], limit=1), None))
@@ -279,15 +509,7 @@ class Database:
     def _bbcode(self) -> bool:
         return bool(self.database.settings.bbcode)
 
-    @lru_cache
-    def _search(
-        self,
-        table_name: str,
-        query: str,
-        sort: str,
-        order: str,
-        limit: int | None,
-    ) -> SearchResults:
+    def _search_query(self, table_name: str, query: str, sort: str, order: str) -> SearchQuery:
         cols_results: list[str]
         cols_any: list[str]
         cols_substring: list[str]
@@ -483,7 +705,7 @@ class Database:
         if cols_any:
             cols_aliases["any"] = f"({'||'.join(cols_any)})"
             cols_substring.append("any")
-        sort = sort if sort.lower() in cols_table else default_sort[table_name]
+        sort = sort if sort.lower() in cols_table or sort.lower() == "relevance" else default_sort[table_name]
 
         sql, values = query_to_sql(
             query.lower(),
@@ -492,26 +714,10 @@ class Database:
             cols_substring,
             cols_lower,
             cols_aliases,
-            score=sort.lower() == "relevance",
         )
 
-        cursor: Cursor
-
-        if sort.lower() == "relevance":
-            cursor = table.select_sql(
-                f"RELEVANCE > 0",
-                values,
-                [*cols_results, f"({sql if sql else 1}) as RELEVANCE"],
-                [f"{actual_sort} {order}", f"{default_sort[table_name]} {default_order[table_name]}"],
-                limit,
-            ).cursor
-            cols_results.append("RELEVANCE")
-        else:
-            cursor = table.select_sql(sql, values, cols_results, [f"{actual_sort} {order}"], limit).cursor
-
-        cursor.row_factory = Row
-        return SearchResults(
-            cursor.fetchall(),
+        results: SearchResults = SearchResults(
+            None,
             col_id,
             cols_table + ["RELEVANCE"],
             cols_results,
@@ -520,6 +726,118 @@ class Database:
             order,
         )
 
+        if sort.lower() == "relevance":
+            relevance, relevance_values = relevance_sql(
+                table_name,
+                query_to_terms(
+                    query.lower(),
+                    default_column.lower(),
+                    cols_table,
+                    cols_substring,
+                    cols_aliases,
+                    {a: c.lower() for a, c in search_alias_columns[table_name].items()},
+                ),
+            )
+            return SearchQuery(
+                table,
+                sql,
+                [*relevance_values, *values],
+                [*cols_results, f"{relevance} as RELEVANCE"],
+                [f"RELEVANCE {order}", f"{col_id} {default_order[table_name]}"],
+                [(relevance, order == "desc"), (col_id, default_order[table_name] == "desc")],
+                relevance_values,
+                results._replace(columns_results=[*cols_results, "RELEVANCE"]),
+            )
+
+        return SearchQuery(
+            table,
+            sql,
+            values,
+            cols_results,
+            [f"{actual_sort} {order}"],
+            [(actual_sort, order == "desc")],
+            [],
+            results,
+        )
+
+    def _search_select(
+        self,
+        table_name: str,
+        query: str,
+        sort: str,
+        order: str,
+        limit: int | None,
+        offset: int = 0,
+    ) -> tuple[FACursor, SearchResults]:
+        search_query: SearchQuery = self._search_query(table_name, query, sort, order)
+        selected: FACursor = search_query.table.select_sql(
+            search_query.sql,
+            search_query.values,
+            search_query.columns,
+            search_query.order,
+            limit,
+            offset,
+        )
+        selected.cursor.row_factory = Row
+        return selected, search_query.results
+
+    def _search_cursor(
+        self,
+        table_name: str,
+        query: str,
+        sort: str,
+        order: str,
+        limit: int | None,
+        offset: int = 0,
+    ) -> tuple[Cursor, SearchResults]:
+        selected, results = self._search_select(table_name, query, sort, order, limit, offset)
+        return selected.cursor, results
+
+    @ResultCache
+    def _search(
+        self,
+        table_name: str,
+        query: str,
+        sort: str,
+        order: str,
+        limit: int | None,
+    ) -> SearchResults:
+        time_start: datetime = datetime.now()
+        selected, results = self._search_select(table_name, query, sort, order, limit)
+        results = results._replace(rows=ColumnarRows.from_cursor(selected.cursor))
+        if self.slow_queries:
+            self.slow_queries.observe(
+                self.database.connection,
+                time_start,
+                selected.query,
+                selected.query_values,
+                (datetime.now() - time_start).total_seconds(),
+                len(results.rows),
+            )
+        return results
+
+    @lru_cache
+    def _facet_index(self) -> FacetIndex:
+        return FacetIndex(
+            self.database.execute(
+                f"select {SubmissionsColumns.ID.name}, {', '.join(facets_columns)} from {submissions_table}"
+            )
+        )
+
+    @lru_cache
+    def _facets(self, table_name: str, query: str) -> dict[str, list[tuple[str, int]]]:
+        if table_name.upper() != submissions_table:
+            return {}
+        ids: set[int] | None = next(
+            (
+                set(results.rows.column(results.column_id))
+                for (table, query_, _, _, limit), results in self._search.items(self)
+                if table == table_name and query_ == query and (not limit or len(results.rows) < limit)
+            ),
+            None,
+        )
+        return self.facet_index().facets(set(self.search_ids(table_name, query)) if ids is None else ids)
+
     @lru_cache
     def _user(self, username: str):
         bbcode = self.bbcode()
@@ -565,16 +883,51 @@ class Database:
             submission["FOOTER"] = prepare_html(submission["FOOTER"], bbcode)
         return submission
 
+    @lru_cache
+    def _files_folder(self) -> Path:
+        return self.database.settings.files_folder
+
+    def _submission_files_batch(self, submission_ids: list[int]) -> dict[int, tuple[list[Path] | None, Path | None]]:
+        files_folder: Path = self.files_folder()
+        cursor: Cursor = self.database.execute(
+            f"select {SubmissionsColumns.ID.name}, {SubmissionsColumns.FILESAVED.name}, "
+            f"{SubmissionsColumns.FILEEXT.name} from {submissions_table} "
+            f"where {SubmissionsColumns.ID.name} in ({','.join('?' * len(submission_ids))})",
+            submission_ids,
+        )
+        return {
+            submission_id: submission_files_paths(
+                files_folder,
+                submission_id,
+                file_saved,
+                SubmissionsColumns.FILEEXT.from_entry(file_ext),
+            )
+            for submission_id, file_saved, file_ext in cursor
+        }
+
     @lru_cache
     def _submission_files(self, submission_id: int) -> tuple[list[Path] | None, Path | None]:
-        return self.database.submissions.get_submission_files(submission_id)
+        if (files := self.submission_files_prefetched.pop(submission_id, None)) is not None:
+            return files
+        return self._submission_files_batch([submission_id]).get(submission_id, (None, None))
+
+    @lru_cache
+    def _submission_file_text(self, file: Path) -> str | None:
+        try:
+            return file.read_bytes().decode(self.file_charset(file) or "utf-8", "ignore")
+        except OSError:
+            return None
+
+    @lru_cache
+    def _submission_file_html(self, file: Path) -> str:
+        return bbcode_to_html(self.submission_file_text(file) or "")
 
     @lru_cache
     def _submission_files_text(self, *files: Path) -> list[str | None]:
         return [
             (
-                bbcode_to_html(f.read_text(detect_encoding(f.read_bytes())["encoding"], "ignore"))
-                if f.suffix == ".txt" and f.is_file()
+                bbcode_to_html((self.submission_file_text(f) or "")[:text_preview_size])
+                if f.suffix == ".txt" and self.file_entry(f)
                 else ""
             )
             for f in files
@@ -583,7 +936,11 @@ class Database:
     @lru_cache
     def _submission_files_mime(self, *files: Path) -> list[str | None]:
         return [
-            guess_mime(f) if f.is_file() else t.mime if (t := get_type(ext=f.suffix.strip("."))) else None
+            (
+                (e.mime or guess_mime(f))
+                if (e := self.file_entry(f))
+                else t.mime if (t := get_type(ext=f.suffix.strip("."))) else None
+            )
             for f in files
         ]
 
@@ -666,11 +1023,212 @@ class Database:
         if self._settings.__wrapped__(self) != settings:
             self.database.settings["SERVER.SEARCH"] = dumps(settings).decode("utf-8")
             self.database.commit()
+            if self.snapshot:
+                with closing(connect(self.source, timeout=60)) as connection, connection:
+                    connection.execute(
+                        f"insert or replace into {settings_table} (SETTING, SVALUE) values (?, ?)",
+                        ["SERVER.SEARCH", dumps(settings).decode("utf-8")],
+                    )
             self._settings.cache_clear()
 
     def stats(self) -> tuple[int, int, int, int, datetime]:
         return self.call_cached_method(self._stats)
 
+    def setup_stats(self) -> bool:
+        try:
+            if self.snapshot:
+                with closing(connect(self.source, timeout=60)) as connection:
+                    install_stats(connection, stats_tables(self.database))
+            else:
+                install_stats(self.database.connection, stats_tables(self.database))
+        except DatabaseError:
+            return False
+        self.stats_counters = True
+        self._stats.cache_clear()
+        return True
+
+    def setup_file_index(self) -> FileIndex:
+        self.file_index = FileIndex(self.source.with_name(f"{self.source.stem}.fileindex.db"), self.files_folder())
+        self.file_index.open()
+        return self.file_index
+
+    def file_entry(self, path: Path) -> FileEntry | None:
+        if self.file_index:
+            return self.file_index.entry(path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return FileEntry(path.name, stat.st_size, stat.st_mtime, None) if S_ISREG(stat.st_mode) else None
+
+    def file_stat(self, path: Path) -> stat_result | None:
+        if not self.file_index:
+            try:
+                return stat if S_ISREG((stat := path.stat()).st_mode) else None
+            except OSError:
+                return None
+        elif not (entry := self.file_index.entry(path)):
+            return None
+        mtime: int = int(entry.mtime)
+        return stat_result((S_IFREG | 0o644, 0, 0, 1, 0, 0, entry.size, mtime, mtime, mtime), {"st_mtime": entry.mtime})
+
+    def file_charset(self, path: Path) -> str | None:
+        if not (entry := self.file_entry(path)):
+            return None
+        elif entry.charset is None:
+            entry = entry._replace(charset=file_charset(path, entry.size, entry.mtime))
+            if self.file_index:
+                self.file_index.set_charset(path, entry.charset)
+        return entry.charset or None
+
+    def resume_reorder(self, submission_id: int) -> bool:
+        if not resume_reorder(folder := self.submission_folder(submission_id)):
+            return False
+        reconcile_file_ext(self.database.connection, submission_id, folder)
+        self.refresh_files(submission_id)
+        self.update_cached_rows(submissions_table, submission_id)
+        return True
+
+    def refresh_files(self, submission_id: int):
+        if self.file_index:
+            self.file_index.refresh(submission_id)
+
+    def forget_files(self, submission_id: int):
+        if self.file_index:
+            self.file_index.forget(submission_id)
+
+    def search_ids(self, table: str, query: str) -> list[int]:
+        cursor, results = self._search_cursor(table.lower().strip(), query.lower().strip(), "id", "asc", 0)
+        try:
+            return [row[results.column_id] for row in cursor]
+        finally:
+            cursor.close()
+
+    def _update_search_results(
+        self,
+        table_name: str,
+        query: str,
+        sort: str,
+        order: str,
+        limit: int | None,
+        results: SearchResults,
+        ids: tuple[int | str, ...],
+    ) -> SearchResults | None:
+        if limit and len(results.rows) >= limit:
+            return None
+        search_query: SearchQuery = self._search_query(table_name, query, sort, order)
+        col_id: str = search_query.results.column_id
+        ids_sql: str = f"{col_id} in ({', '.join('?' * len(ids))})"
+        cursor: Cursor = search_query.table.select_sql(
+            f"({search_query.sql}) and {ids_sql}" if search_query.sql else ids_sql,
+            [*search_query.values, *ids],
+            search_query.columns,
+        ).cursor
+        cursor.row_factory = Row
+        rows: ColumnarRows = results.rows.without(col_id, ids)
+        if not (new_rows := cursor.fetchall()) and rows is results.rows:
+            return results
+        keys_sql: str = (
+            f"select {', '.join(e for e, _ in search_query.keys)} from {search_query.table.name} where {col_id} = ?"
+        )
+        descending: list[bool] = [d for _, d in search_query.keys]
+
+        def key(row: Row) -> SortKey:
+            return SortKey(
+                self.database.execute(keys_sql, [*search_query.keys_values, row[col_id]]).fetchone(), descending
+            )
+
+        for row in new_rows:
+            rows = insert_sorted(rows, row, key(row), key)
+        return results._replace(rows=rows)
+
+    def update_cached_rows(self, table_name: str, *ids: int | str):
+        table_name = table_name.lower()
+        with timer("update_cached_rows"):
+            for (table, query, sort, order, limit), results in self._search.items(self):
+                if table == table_name:
+                    self._search.replace(
+                        self,
+                        (table, query, sort, order, limit),
+                        self._update_search_results(table, query, sort, order, limit, results, ids),
+                    )
+            if table_name == submissions_table.lower() and self._facet_index.cache_info().currsize:
+                facet_index: FacetIndex = self.facet_index()
+                for submission_id in ids:
+                    facet_index.update(
+                        submission_id,
+                        self.database.execute(
+                            f"select {', '.join(facets_columns)} from {submissions_table} where ID = ?",
+                            [submission_id],
+                        ).fetchone(),
+                    )
+        suggestions: bool = self.update_suggestions(table_name, ids)
+        self.submission_files_prefetched.clear()
+        self.invalidate_cache(
+            *(
+                method
+                for attr_name in dir(self)
+                if attr_name not in ("_clear_cache", "_search", "_facet_index", "_settings", "_bbcode", "_files_folder")
+                and hasattr(method := getattr(self, attr_name), "cache_clear")
+            )
+        )
+        if suggestions:
+            self.suggestions.version = self.version
+
+    def update_suggestions(self, table_name: str, keys: Iterable[int | str]) -> bool:
+        if not self.suggestions or self.suggestions.version != self.version:
+            return False
+        elif (table_name := table_name.upper()) not in (users_table, submissions_table):
+            return True
+        keys = list(keys)
+        with timer("update_suggestions"):
+            for n in range(0, len(keys), suggestions_chunk_size):
+                chunk: list[int | str] = keys[n : n + suggestions_chunk_size]
+                marks: str = ", ".join("?" * len(chunk))
+                if table_name == users_table:
+                    rows: dict[str, tuple[str]] = {
+                        username: row
+                        for username, *row in self.database.execute(
+                            f"select {UsersColumns.USERNAME.name}, {UsersColumns.FOLDERS.name} from {users_table}"
+                            f" where {UsersColumns.USERNAME.name} in ({marks})",
+                            chunk,
+                        )
+                    }
+                    for username in chunk:
+                        self.suggestions.update_user(username, rows.get(username))
+                else:
+                    rows: dict[int, tuple[str, str, str]] = {
+                        submission_id: row
+                        for submission_id, *row in self.database.execute(
+                            f"select {SubmissionsColumns.ID.name}, {SubmissionsColumns.AUTHOR.name}, "
+                            f"{SubmissionsColumns.TAGS.name}, {SubmissionsColumns.SPECIES.name} "
+                            f"from {submissions_table} where {SubmissionsColumns.ID.name} in ({marks})",
+                            chunk,
+                        )
+                    }
+                    for submission_id in chunk:
+                        self.suggestions.update_submission(submission_id, rows.get(submission_id))
+        return True
+
+    def delete(self, table: str, *keys: int | str) -> tuple[int, int]:
+        deleted, comments = delete_rows(self.database.connection, table, keys)
+        if comments:
+            for args, _ in self._search.items(self):
+                if args[0] == comments_table.lower():
+                    self._search.replace(self, args, None)
+        if table.upper() == submissions_table:
+            for submission_id in keys:
+                self.forget_files(submission_id)
+        self.update_cached_rows(table, *keys)
+        return deleted, comments
+
+    def recount_stats(self) -> dict[str, int]:
+        if not self.stats_counters:
+            raise ValueError("Statistics counters are not enabled")
+        counts: dict[str, int] = recount_stats(self.source)
+        self._stats.cache_clear()
+        return counts
+
     def bbcode(self) -> bool:
         return self.call_cached_method(self._bbcode)
 
@@ -689,7 +1247,7 @@ class Database:
         else:
             results = self.call_cached_method(self._search, table, query, sort, "desc", limit)
             return SearchResults(
-                list(reversed(results.rows)),
+                results.rows.reversed(),
                 results.column_id,
                 results.columns_table,
                 results.columns_results,
@@ -698,6 +1256,46 @@ class Database:
                 order,
             )
 
+    def search_cursor(
+        self,
+        table: str,
+        query: str,
+        sort: str,
+        order: str,
+        offset: int = 0,
+        limit: int = 0,
+    ) -> tuple[Cursor, SearchResults]:
+        end: int = offset + limit if limit else 0
+        if self.max_results:
+            end = min(end or self.max_results, self.max_results)
+        with timer("search_cursor"):
+            return self._search_cursor(
+                table.lower().strip(),
+                query.lower().strip(),
+                sort.lower().strip(),
+                order.lower().strip(),
+                end - offset if end else sqlite_max_limit if offset else 0,
+                offset,
+            )
+
+    def facet_index(self) -> FacetIndex:
+        return self.call_cached_method(self._facet_index)
+
+    def facets(self, table: str, query: str) -> dict[str, list[tuple[str, int]]]:
+        return self.call_cached_method(self._facets, table.lower().strip(), query.lower().strip())
+
+    def suggestion_index(self) -> SuggestionIndex | None:
+        version: tuple[int, int] = self.version
+        if self.suggestions and self.suggestions.version == version:
+            return self.suggestions
+        elif not self.suggestions_thread or not self.suggestions_thread.is_alive():
+            self.suggestions_thread = Thread(target=self._build_suggestion_index, args=(version,), daemon=True)
+            self.suggestions_thread.start()
+        return self.suggestions
+
+    def _build_suggestion_index(self, version: tuple[int, int]):
+        self.suggestions = build_suggestion_index(self.path, version, self.tuning)
+
     def user(self, username: str) -> dict[str, Any] | None:
         return self.call_cached_method(self._user, username)
 
@@ -707,9 +1305,32 @@ class Database:
     def submission(self, submission_id: int) -> dict[str, Any] | None:
         return self.call_cached_method(self._submission, submission_id)
 
+    def files_folder(self) -> Path:
+        return self.call_cached_method(self._files_folder)
+
+    def submission_folder(self, submission_id: int) -> Path:
+        return self.files_folder() / tiered_path(submission_id)
+
     def submission_files(self, submission_id: int) -> tuple[list[Path] | None, Path | None]:
         return self.call_cached_method(self._submission_files, submission_id)
 
+    def prefetch_submission_files(self, submission_ids: Iterable[int]):
+        if not self.use_cache:
+            return
+        if not (submission_ids := [i for i in submission_ids if i not in self.submission_files_prefetched]):
+            return
+        with timer("prefetch_submission_files"):
+            if len(self.submission_files_prefetched) + len(submission_ids) > max_prefetched_submission_files:
+                self.submission_files_prefetched.clear()
+            for n in range(0, len(submission_ids), 500):
+                self.submission_files_prefetched |= self._submission_files_batch(submission_ids[n : n + 500])
+
+    def submission_file_text(self, file: Path) -> str | None:
+        return self.call_cached_method(self._submission_file_text, file)
+
+    def submission_file_html(self, file: Path) -> str:
+        return self.call_cached_method(self._submission_file_html, file)
+
     def submission_files_text(self, *files: Path) -> list[str | None]:
         return self.call_cached_method(self._submission_files_text, *files)
 
@@ -0,0 +1,154 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import SimpleQueue
+from sqlite3 import Connection
+from threading import Thread
+from time import time
+from typing import Iterable
+
+from falocalrepo_database.tables import SubmissionsColumns
+from falocalrepo_database.tables import comments_table
+from falocalrepo_database.tables import journals_table
+from falocalrepo_database.tables import submissions_table
+from falocalrepo_database.tables import users_table
+
+from falocalrepo_server.fileindex import scan_tree
+from falocalrepo_server.fileindex import submission_folder
+from falocalrepo_server.fileindex import tier_level
+
+orphan_scan_workers: int = 8
+orphans_grace_period: int = 600
+deletion_keys: dict[str, str] = {users_table: "USERNAME", submissions_table: "ID", journals_table: "ID"}
+
+
+def delete_rows(connection: Connection, table_name: str, keys: Iterable[int | str]) -> tuple[int, int]:
+    table_name = table_name.upper()
+    keys = list(keys)
+    marks: str = ", ".join("?" * len(keys))
+    with connection:
+        deleted: int = connection.execute(
+            f"delete from {table_name} where {deletion_keys[table_name]} in ({marks})", keys
+        ).rowcount
+        comments: int = 0
+        if table_name in (submissions_table, journals_table):
+            comments = connection.execute(
+                f"delete from {comments_table} where PARENT_TABLE = ? and PARENT_ID in ({marks})",
+                [table_name, *keys],
+            ).rowcount
+    return deleted, comments
+
+
+def remove_files(files: Iterable[Path]) -> int:
+    removed: int = 0
+    folders: set[Path] = set()
+    for file in files:
+        try:
+            file.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError:
+            continue
+        folders.add(file.parent)
+    for folder in folders:
+        try:
+            folder.rmdir()
+        except OSError:
+            pass
+    return removed
+
+
+class FileReaper:
+    def __init__(self):
+        self.queue: SimpleQueue[list[Path] | None] = SimpleQueue()
+        self.thread: Thread | None = None
+        self.pending: int = 0
+        self.removed: int = 0
+
+    def start(self):
+        self.thread = Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 10):
+        if not self.thread:
+            return
+        self.queue.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+
+    def remove(self, files: Iterable[Path]):
+        if files := list(files):
+            self.pending += len(files)
+            self.queue.put(files)
+
+    def work(self):
+        while (files := self.queue.get()) is not None:
+            self.removed += remove_files(files)
+            self.pending -= len(files)
+
+
+def expected_files(file_ext: list[str]) -> set[str]:
+    return {"thumbnail.jpg", *(f"submission{n or ''}{('.' + ext) if ext else ''}" for n, ext in enumerate(file_ext))}
+
+
+def submissions_files(connection: Connection) -> dict[int, list[str]]:
+    return {
+        submission_id: SubmissionsColumns.FILEEXT.from_entry(file_ext)
+        for submission_id, file_ext in connection.execute(f"select ID, FILEEXT from {submissions_table}")
+    }
+
+
+def scan_orphans(
+    files_folder: Path,
+    submissions: dict[int, list[str]],
+    workers: int = orphan_scan_workers,
+) -> list[tuple[int, Path]]:
+    level, depth = tier_level(files_folder, workers)
+
+    def scan(folder: tuple[str, str]) -> list[tuple[int, Path]]:
+        orphans: list[tuple[int, Path]] = []
+        for submission_id, files in scan_tree(folder[0], folder[1], depth).items():
+            keep: set[str] = expected_files(submissions[submission_id]) if submission_id in submissions else set()
+            orphans.extend(
+                (submission_id, submission_folder(files_folder, submission_id) / name)
+                for name in files
+                if name not in keep
+            )
+        return orphans
+
+    with ThreadPoolExecutor(workers) as executor:
+        return [o for orphans in executor.map(scan, level) for o in orphans]
+
+
+def find_orphans(
+    connection: Connection,
+    files_folder: Path,
+    workers: int = orphan_scan_workers,
+) -> list[tuple[int, Path]]:
+    orphans: list[tuple[int, Path]] = scan_orphans(files_folder, submissions_files(connection), workers)
+    submissions: dict[int, list[str]] = submissions_files(connection)
+    return [(i, f) for i, f in orphans if i not in submissions or f.name not in expected_files(submissions[i])]
+
+
+def orphans_size(orphans: list[tuple[int, Path]]) -> int:
+    size: int = 0
+    for _, file in orphans:
+        try:
+            size += file.stat().st_size
+        except OSError:
+            pass
+    return size
+
+
+def settled_orphans(
+    orphans: list[tuple[int, Path]], grace_period: int = orphans_grace_period
+) -> list[tuple[int, Path]]:
+    cutoff: float = time() - grace_period
+    settled: list[tuple[int, Path]] = []
+    for submission_id, file in orphans:
+        try:
+            if file.stat().st_mtime < cutoff:
+                settled.append((submission_id, file))
+        except OSError:
+            pass
+    return settled
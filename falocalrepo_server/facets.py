@@ -0,0 +1,88 @@
+from collections import Counter
+from heapq import heappush
+from heapq import heapreplace
+from itertools import chain
+from typing import Iterable
+
+from falocalrepo_database.tables import SubmissionsColumns
+
+facets_scan_ratio: int = 8
+facets_columns: list[str] = [
+    SubmissionsColumns.TAGS.name,
+    SubmissionsColumns.SPECIES.name,
+    SubmissionsColumns.CATEGORY.name,
+    SubmissionsColumns.RATING.name,
+    SubmissionsColumns.AUTHOR.name,
+]
+
+
+class FacetIndex:
+    def __init__(self, rows: Iterable[tuple[int, str, str, str, str, str]]):
+        self.strings: dict[str, str] = {}
+        self.entries: dict[int, tuple[tuple[str, ...], ...]] = {}
+        self.postings: list[dict[str, set[int]]] = [{} for _ in facets_columns]
+        self.ordered: list[list[tuple[str, set[int]]] | None] = [None for _ in facets_columns]
+        for id_, *row in rows:
+            self.add(id_, self.entry(*row))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def intern(self, value: str) -> str:
+        return self.strings.setdefault(value, value)
+
+    def entry(self, tags: str, species: str, category: str, rating: str, author: str) -> tuple[tuple[str, ...], ...]:
+        return (
+            tuple(self.intern(t) for t in dict.fromkeys(tags.strip("|").split("||")) if t),
+            *((self.intern(v),) if v else () for v in (species, category, rating, author)),
+        )
+
+    def add(self, id_: int, entry: tuple[tuple[str, ...], ...]):
+        self.entries[id_] = entry
+        for postings, values in zip(self.postings, entry):
+            for value in values:
+                postings.setdefault(value, set()).add(id_)
+
+    def remove(self, id_: int):
+        for postings, values in zip(self.postings, self.entries.pop(id_, ())):
+            for value in values:
+                if (posting := postings.get(value)) is not None:
+                    posting.discard(id_)
+                    if not posting:
+                        del postings[value]
+
+    def update(self, id_: int, row: tuple[str, str, str, str, str] | None):
+        self.remove(id_)
+        if row:
+            self.add(id_, self.entry(*row))
+        self.ordered = [None for _ in facets_columns]
+
+    def top(self, index: int, ids: set[int], limit: int) -> list[tuple[str, int]]:
+        if (ordered := self.ordered[index]) is None:
+            ordered = self.ordered[index] = sorted(self.postings[index].items(), key=lambda p: len(p[1]), reverse=True)
+        top: list[tuple[int, str]] = []
+        for value, posting in ordered:
+            if len(top) == limit and len(posting) <= top[0][0]:
+                break
+            elif not (count := len(ids.intersection(posting))):
+                continue
+            elif len(top) < limit:
+                heappush(top, (count, value))
+            elif count > top[0][0]:
+                heapreplace(top, (count, value))
+        return [(v, n) for n, v in sorted(top, key=lambda t: (-t[0], t[1]))]
+
+    def count(self, ids: set[int], limit: int) -> list[list[tuple[str, int]]]:
+        entries: list[tuple[tuple[str, ...], ...]] = list(filter(None, map(self.entries.get, ids)))
+        return [
+            sorted(
+                Counter(chain.from_iterable(e[index] for e in entries)).most_common(limit), key=lambda t: (-t[1], t[0])
+            )
+            for index in range(len(facets_columns))
+        ]
+
+    def facets(self, ids: Iterable[int], limit: int = 20) -> dict[str, list[tuple[str, int]]]:
+        ids = ids if isinstance(ids, set) else set(ids)
+        if len(ids) * facets_scan_ratio < len(self.entries):
+            return dict(zip(facets_columns, self.count(ids, limit)))
+        return {column: self.top(index, ids, limit) for index, column in enumerate(facets_columns)}
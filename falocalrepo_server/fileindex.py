@@ -0,0 +1,218 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from os import DirEntry
+from os import scandir
+from pathlib import Path
+from sqlite3 import Connection
+from sqlite3 import connect
+from threading import Lock
+from typing import Any
+
+from falocalrepo_database.util import tiered_path
+from filetype import guess_mime
+
+FileEntry = namedtuple("FileEntry", ["name", "size", "mtime", "mime", "charset"], defaults=[None])
+
+file_index_tiers: int = 5
+file_index_tier_width: int = 2
+file_index_workers: int = 8
+
+
+def file_mime(path: str | Path) -> str | None:
+    try:
+        return guess_mime(str(path))
+    except OSError:
+        return None
+
+
+def scan_folder(folder: str | Path) -> dict[str, FileEntry]:
+    try:
+        with scandir(folder) as entries:
+            return {
+                e.name: FileEntry(e.name, (s := e.stat()).st_size, s.st_mtime, file_mime(e.path))
+                for e in entries
+                if not e.name.startswith(".") and e.is_file()
+            }
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
+
+
+def tier_folders(folder: str | Path) -> list[DirEntry]:
+    try:
+        with scandir(folder) as entries:
+            return [e for e in entries if len(e.name) == file_index_tier_width and e.name.isdigit() and e.is_dir()]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def scan_tree(folder: str | Path, prefix: str, depth: int) -> dict[int, dict[str, FileEntry]]:
+    if depth == file_index_tiers:
+        return {int(prefix): files} if (files := scan_folder(folder)) else {}
+    return {k: v for e in tier_folders(folder) for k, v in scan_tree(e.path, prefix + e.name, depth + 1).items()}
+
+
+def tier_level(folder: str | Path, workers: int) -> tuple[list[tuple[str, str]], int]:
+    level: list[tuple[str, str]] = [(str(folder), "")]
+    depth: int = 0
+    while depth < file_index_tiers - 1 and len(level) < workers * 4:
+        level = [(e.path, prefix + e.name) for folder, prefix in level for e in tier_folders(folder)]
+        depth += 1
+    return level, depth
+
+
+def submission_folder(files_folder: Path, submission_id: int) -> Path:
+    return files_folder / tiered_path(submission_id, file_index_tiers, file_index_tier_width)
+
+
+class FileIndex:
+    def __init__(self, path: Path, files_folder: Path):
+        self.path: Path = path
+        self.files_folder: Path = files_folder
+        self.folders: dict[int, dict[str, FileEntry]] = {}
+        self.checked: set[int] = set()
+        self.refreshed: set[int] = set()
+        self.scanned: datetime | None = None
+        self.scanning: bool = False
+        self.connection: Connection | None = None
+        self.lock: Lock = Lock()
+
+    def open(self):
+        self.connection = connect(self.path, check_same_thread=False)
+        self.connection.execute("create table if not exists INDEX_SETTINGS (SETTING text primary key, SVALUE text)")
+        self.connection.execute("create table if not exists FOLDERS (ID integer primary key)")
+        self.connection.execute(
+            "create table if not exists FILES"
+            " (ID integer, NAME text, SIZE integer, MTIME real, MIME text, CHARSET text, primary key (ID, NAME))"
+        )
+        if "CHARSET" not in {c[1] for c in self.connection.execute("pragma table_info(FILES)")}:
+            self.connection.execute("alter table FILES add column CHARSET text")
+        settings: dict[str, str] = dict(self.connection.execute("select SETTING, SVALUE from INDEX_SETTINGS"))
+        if settings.get("FILESFOLDER") != str(self.files_folder):
+            self.save({}, True)
+            return
+        self.scanned = datetime.fromisoformat(s) if (s := settings.get("SCANNED")) else None
+        self.folders = {i: {} for [i] in self.connection.execute("select ID from FOLDERS")}
+        for submission_id, *entry in self.connection.execute("select ID, NAME, SIZE, MTIME, MIME, CHARSET from FILES"):
+            self.folders.setdefault(submission_id, {})[entry[0]] = FileEntry(*entry)
+
+    def close(self):
+        with self.lock:
+            if self.connection:
+                self.connection.close()
+            self.connection = None
+
+    def save(self, folders: dict[int, dict[str, FileEntry]], replace: bool = False):
+        with self.lock:
+            if not self.connection:
+                return
+            if replace:
+                self.connection.execute("delete from INDEX_SETTINGS")
+                self.connection.execute("delete from FOLDERS")
+                self.connection.execute("delete from FILES")
+            else:
+                self.connection.executemany("delete from FILES where ID = ?", [(i,) for i in folders])
+            self.connection.executemany("insert or replace into FOLDERS (ID) values (?)", [(i,) for i in folders])
+            self.connection.executemany(
+                "insert into FILES (ID, NAME, SIZE, MTIME, MIME, CHARSET) values (?, ?, ?, ?, ?, ?)",
+                [(i, *e) for i, files in folders.items() for e in files.values()],
+            )
+            if replace:
+                self.connection.execute(
+                    "insert into INDEX_SETTINGS (SETTING, SVALUE) values ('FILESFOLDER', ?)", [str(self.files_folder)]
+                )
+            if replace and self.scanned:
+                self.connection.execute(
+                    "insert into INDEX_SETTINGS (SETTING, SVALUE) values ('SCANNED', ?)", [self.scanned.isoformat()]
+                )
+            self.connection.commit()
+
+    def submission_folder(self, submission_id: int) -> Path:
+        return submission_folder(self.files_folder, submission_id)
+
+    def submission_id(self, path: Path) -> int | None:
+        try:
+            parts: tuple[str, ...] = path.parent.relative_to(self.files_folder).parts
+        except ValueError:
+            return None
+        return int("".join(parts)) if len(parts) == file_index_tiers and all(p.isdigit() for p in parts) else None
+
+    def keep_charsets(self, submission_id: int, files: dict[str, FileEntry]) -> dict[str, FileEntry]:
+        if not (old_files := self.folders.get(submission_id)):
+            return files
+        return {
+            n: e._replace(charset=old.charset) if (old := old_files.get(n)) and old[:3] == e[:3] else e
+            for n, e in files.items()
+        }
+
+    def refresh(self, submission_id: int) -> dict[str, FileEntry]:
+        files: dict[str, FileEntry] = self.keep_charsets(
+            submission_id, scan_folder(self.submission_folder(submission_id))
+        )
+        self.folders[submission_id] = files
+        self.checked.add(submission_id)
+        self.refreshed.add(submission_id)
+        self.save({submission_id: files})
+        return files
+
+    def entry(self, path: Path) -> FileEntry | None:
+        if (submission_id := self.submission_id(path)) is None:
+            return None
+        if (files := self.folders.get(submission_id)) is None:
+            files = self.refresh(submission_id)
+        if (entry := files.get(path.name)) is None and submission_id not in self.checked:
+            entry = self.refresh(submission_id).get(path.name)
+        return entry
+
+    def set_charset(self, path: Path, charset: str):
+        if (submission_id := self.submission_id(path)) is None or not (files := self.folders.get(submission_id)):
+            return
+        elif (entry := files.get(path.name)) is None:
+            return
+        files[path.name] = entry._replace(charset=charset)
+        with self.lock:
+            if not self.connection:
+                return
+            self.connection.execute(
+                "update FILES set CHARSET = ? where ID = ? and NAME = ?", [charset, submission_id, path.name]
+            )
+            self.connection.commit()
+
+    def forget(self, submission_id: int):
+        self.folders[submission_id] = {}
+        self.checked.add(submission_id)
+        self.save({submission_id: {}})
+
+    def forget_missing(self):
+        self.checked.clear()
+
+    def scan(self, workers: int = file_index_workers):
+        self.scanning = True
+        try:
+            self._scan(workers)
+        finally:
+            self.scanning = False
+
+    def _scan(self, workers: int):
+        scanned: datetime = datetime.now()
+        self.refreshed.clear()
+        level, depth = tier_level(self.files_folder, workers)
+        folders: dict[int, dict[str, FileEntry]] = {}
+        with ThreadPoolExecutor(workers) as executor:
+            for result in executor.map(lambda f: scan_tree(f[0], f[1], depth), level):
+                folders |= {i: self.keep_charsets(i, files) for i, files in result.items()}
+        folders |= {i: self.folders[i] for i in list(self.refreshed) if i in self.folders}
+        self.folders = folders
+        self.checked.clear()
+        self.scanned = scanned
+        self.save(folders, True)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "files_folder": str(self.files_folder),
+            "submissions": len(self.folders),
+            "files": sum(map(len, self.folders.values())),
+            "scanned": self.scanned.isoformat() if self.scanned else None,
+            "scanning": self.scanning,
+        }
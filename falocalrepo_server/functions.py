@@ -10,6 +10,8 @@ from bs4.element import NavigableString
 from bs4.element import Tag
 from falocalrepo_database.util import clean_username
 
+from falocalrepo_server.timing import timed
+
 
 fa_link: Pattern = re_compile(r"(https?://)?(www.)?furaffinity.net", flags=IGNORECASE)
 # noinspection SpellCheckingInspection
@@ -72,6 +74,7 @@ def prepare_comments(comments: list[dict], use_bbcode: bool) -> list[dict]:
 
 
 # noinspection SpellCheckingInspection
+@timed("bbcode")
 def bbcode_to_html(bbcode: str) -> str:
     def render_url(_tag_name, value: str, options: dict[str, str], _parent, _context) -> str:
         return f'<a class="auto_link named_url" href="{options.get("url", "#")}">{value}</a>'
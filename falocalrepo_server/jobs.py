@@ -0,0 +1,232 @@
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+from queue import PriorityQueue
+from sqlite3 import Connection
+from sqlite3 import DatabaseError
+from sqlite3 import connect
+from threading import Lock
+from threading import Thread
+from time import sleep
+from traceback import format_exception_only
+from typing import Any
+from typing import Callable
+
+from orjson import dumps
+from orjson import loads
+
+from falocalrepo_server.tuning import SQLiteTuning
+from falocalrepo_server.tuning import apply_tuning
+
+jobs_table: str = "SERVER_JOBS"
+job_workers: int = 1
+job_priority_maintenance: int = 10
+job_history: int = 200
+
+Job = namedtuple(
+    "Job",
+    [
+        "id",
+        "kind",
+        "params",
+        "priority",
+        "status",
+        "progress",
+        "total",
+        "result",
+        "error",
+        "created",
+        "started",
+        "finished",
+    ],
+)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobInterrupted(Exception):
+    pass
+
+
+class JobContext:
+    def __init__(self, queue: "JobQueue", job_id: int, connection: Connection):
+        self.queue: JobQueue = queue
+        self.job_id: int = job_id
+        self.connection: Connection = connection
+
+    def progress(self, done: int, total: int | None = None, result: Any = None):
+        if self.queue.stopping:
+            raise JobInterrupted
+        elif self.job_id in self.queue.cancelled:
+            raise JobCancelled
+        job: Job = self.queue.jobs[self.job_id]
+        self.queue.update(
+            self.job_id,
+            progress=done,
+            total=job.total if total is None else total,
+            result=job.result if result is None else result,
+        )
+        sleep(0)
+
+
+JobHandler = Callable[[JobContext, dict[str, Any]], Any]
+
+
+def jobs_path(database_path: Path) -> Path:
+    return database_path.with_name(f"{database_path.stem}.jobs.db")
+
+
+class JobQueue:
+    def __init__(
+        self,
+        database_path: Path,
+        store_path: Path | None = None,
+        workers: int = job_workers,
+        tuning: SQLiteTuning | None = None,
+    ):
+        self.database_path: Path = database_path
+        self.store_path: Path | None = store_path or jobs_path(database_path)
+        self.workers: int = workers
+        self.tuning: SQLiteTuning | None = tuning
+        self.handlers: dict[str, JobHandler] = {}
+        self.jobs: dict[int, Job] = {}
+        self.cancelled: set[int] = set()
+        self.queue: PriorityQueue[tuple[float, int]] = PriorityQueue()
+        self.threads: list[Thread] = []
+        self.connection: Connection | None = None
+        self.lock: Lock = Lock()
+        self.stopping: bool = False
+
+    def register(self, kind: str, handler: JobHandler):
+        self.handlers[kind] = handler
+
+    def start(self):
+        try:
+            self.connection = self.open_store(self.store_path)
+        except DatabaseError:
+            if self.connection:
+                self.connection.close()
+            self.store_path = None
+            self.connection = self.open_store(":memory:")
+        for row in self.connection.execute(f"select * from {jobs_table} order by ID"):
+            job: Job = Job(*row)
+            self.jobs[job.id] = job._replace(params=loads(job.params), result=loads(job.result or "null"))
+            if job.status == "queued":
+                self.queue.put((job.priority, job.id))
+        self.stopping = False
+        self.threads = [Thread(target=self.work, daemon=True) for _ in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def open_store(self, path: Path | str) -> Connection:
+        self.connection = connect(path, timeout=60, check_same_thread=False)
+        self.connection.execute(
+            f"""create table if not exists {jobs_table} (
+            ID integer primary key autoincrement,
+            KIND text not null,
+            PARAMS text not null,
+            PRIORITY integer not null,
+            STATUS text not null,
+            PROGRESS integer not null,
+            TOTAL integer,
+            RESULT text,
+            ERROR text,
+            CREATED text not null,
+            STARTED text,
+            FINISHED text
+            )"""
+        )
+        self.connection.execute(f"update {jobs_table} set STATUS = 'queued', STARTED = null where STATUS = 'running'")
+        self.connection.execute(
+            f"delete from {jobs_table} where STATUS not in ('queued', 'running') and ID not in"
+            f" (select ID from {jobs_table} where STATUS not in ('queued', 'running') order by ID desc limit ?)",
+            [job_history],
+        )
+        self.connection.commit()
+        return self.connection
+
+    def stop(self, timeout: float = 10):
+        self.stopping = True
+        for _ in self.threads:
+            self.queue.put((float("-inf"), 0))
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+        with self.lock:
+            if self.connection:
+                self.connection.close()
+            self.connection = None
+
+    def save(self, job: Job):
+        with self.lock:
+            if not self.connection:
+                return
+            self.connection.execute(
+                f"insert or replace into {jobs_table} values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [*job._replace(params=dumps(job.params).decode(), result=dumps(job.result).decode())],
+            )
+            self.connection.commit()
+
+    def update(self, job_id: int, **fields: Any) -> Job:
+        self.jobs[job_id] = job = self.jobs[job_id]._replace(**fields)
+        return job
+
+    def submit(self, kind: str, params: dict[str, Any] | None = None, priority: int = 0) -> Job:
+        if kind not in self.handlers:
+            raise KeyError(f"Unknown job kind {kind!r}")
+        with self.lock:
+            cursor = self.connection.execute(
+                f"insert into {jobs_table} (KIND, PARAMS, PRIORITY, STATUS, PROGRESS, CREATED)"
+                " values (?, ?, ?, 'queued', 0, ?)",
+                [kind, dumps(params or {}).decode(), priority, datetime.now().isoformat()],
+            )
+            self.connection.commit()
+            job: Job = Job(
+                *self.connection.execute(f"select * from {jobs_table} where ID = ?", [cursor.lastrowid]).fetchone()
+            )
+        self.jobs[job.id] = job = job._replace(params=params or {}, result=None)
+        self.queue.put((job.priority, job.id))
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        if (job := self.jobs.get(job_id)) is None or job.status not in ("queued", "running"):
+            return False
+        if job.status == "queued":
+            self.save(self.update(job_id, status="cancelled", finished=datetime.now().isoformat()))
+        else:
+            self.cancelled.add(job_id)
+        return True
+
+    def active(self, kind: str) -> Job | None:
+        return next((j for j in self.jobs.values() if j.kind == kind and j.status in ("queued", "running")), None)
+
+    def work(self):
+        connection: Connection = apply_tuning(connect(self.database_path, timeout=60), self.tuning)
+        try:
+            while (item := self.queue.get())[1]:
+                if (job := self.jobs.get(item[1])) is None or job.status != "queued":
+                    continue
+                self.run(job, connection)
+        finally:
+            connection.close()
+
+    def run(self, job: Job, connection: Connection):
+        self.save(job := self.update(job.id, status="running", started=datetime.now().isoformat()))
+        try:
+            result: Any = self.handlers[job.kind](JobContext(self, job.id, connection), job.params)
+            job = self.update(job.id, status="done", result=result)
+        except JobInterrupted:
+            connection.rollback()
+            self.save(self.update(job.id, status="queued", started=None))
+            return
+        except JobCancelled:
+            connection.rollback()
+            job = self.update(job.id, status="cancelled")
+        except Exception as err:
+            connection.rollback()
+            job = self.update(job.id, status="failed", error="".join(format_exception_only(err)).strip())
+        finally:
+            self.cancelled.discard(job.id)
+        self.save(self.update(job.id, finished=datetime.now().isoformat()))
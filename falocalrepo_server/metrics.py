@@ -0,0 +1,163 @@
+from asyncio import sleep
+from bisect import bisect_left
+from functools import lru_cache
+from re import sub
+from time import perf_counter
+from typing import Iterable
+
+default_buckets: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+max_query_shapes: int = 256
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = default_buckets):
+        self.buckets: tuple[float, ...] = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0
+        self.count: int = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: dict[str, str]) -> Iterable[str]:
+        cumulative: int = 0
+        for bucket, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            cumulative += count
+            yield f"{name}_bucket{format_labels(labels | {'le': bucket})} {cumulative}"
+        yield f"{name}_sum{format_labels(labels)} {self.sum}"
+        yield f"{name}_count{format_labels(labels)} {self.count}"
+
+
+class Metrics:
+    def __init__(self):
+        self.requests: dict[tuple[str, str], Histogram] = {}
+        self.responses: dict[tuple[str, str, int], int] = {}
+        self.queries: dict[str, list[int | float]] = {}
+        self.cache_invalidations: int = 0
+        self.cache_cleared: dict[str, tuple[int, int]] = {}
+        self.thumbnails: dict[str, int] = {"stored": 0, "resized": 0, "generated": 0}
+        self.loop_lag: Histogram = Histogram()
+
+    def observe_request(self, method: str, route: str, status: int, duration: float):
+        self.requests.setdefault((method, route), Histogram()).observe(duration)
+        self.responses[(method, route, status)] = self.responses.get((method, route, status), 0) + 1
+
+    def observe_query(self, sql: str, duration: float):
+        shape: str = query_shape(sql)
+        if shape not in self.queries and len(self.queries) >= max_query_shapes:
+            shape = "other"
+        entry: list[int | float] = self.queries.setdefault(shape, [0, 0.0])
+        entry[0] += 1
+        entry[1] += duration
+
+    def observe_cache_clear(self, cache_info: dict[str, tuple[int, int, int | None, int]]):
+        self.cache_invalidations += 1
+        for method, (hits, misses, _, _) in cache_info.items():
+            hits_cleared, misses_cleared = self.cache_cleared.get(method, (0, 0))
+            self.cache_cleared[method] = (hits_cleared + hits, misses_cleared + misses)
+
+    def observe_thumbnail(self, source: str):
+        self.thumbnails[source] += 1
+
+    def observe_loop_lag(self, lag: float):
+        self.loop_lag.observe(lag)
+
+
+metrics: Metrics = Metrics()
+
+
+@lru_cache(maxsize=1024)
+def query_shape(sql: str) -> str:
+    sql = sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    sql = sub(r"\?(?:\s*,\s*\?)+", "?", sql)
+    return sub(r"\s+", " ", sql).strip()[:200]
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    return ("{" + ",".join(f'{k}="{escape_label(str(v))}"' for k, v in labels.items()) + "}") if labels else ""
+
+
+def metric_lines(name: str, kind: str, description: str, values: Iterable[tuple[dict[str, str], float]]) -> list[str]:
+    return [
+        f"# HELP {name} {description}",
+        f"# TYPE {name} {kind}",
+        *(f"{name}{format_labels(labels)} {value}" for labels, value in values),
+    ]
+
+
+def render_metrics(cache_info: dict[str, tuple[int, int, int | None, int]]) -> str:
+    lines: list[str] = [
+        "# HELP falocalrepo_http_request_duration_seconds Request latency by route.",
+        "# TYPE falocalrepo_http_request_duration_seconds histogram",
+        *(
+            line
+            for (method, route), histogram in metrics.requests.items()
+            for line in histogram.lines("falocalrepo_http_request_duration_seconds", {"method": method, "route": route})
+        ),
+        *metric_lines(
+            "falocalrepo_http_responses_total",
+            "counter",
+            "Responses by route and status code.",
+            (({"method": m, "route": r, "status": str(s)}, n) for (m, r, s), n in metrics.responses.items()),
+        ),
+        *metric_lines(
+            "falocalrepo_cache_hits_total",
+            "counter",
+            "Database cache hits by method.",
+            (({"method": m}, i[0] + metrics.cache_cleared.get(m, (0, 0))[0]) for m, i in cache_info.items()),
+        ),
+        *metric_lines(
+            "falocalrepo_cache_misses_total",
+            "counter",
+            "Database cache misses by method.",
+            (({"method": m}, i[1] + metrics.cache_cleared.get(m, (0, 0))[1]) for m, i in cache_info.items()),
+        ),
+        *metric_lines(
+            "falocalrepo_cache_entries",
+            "gauge",
+            "Database cache entries by method.",
+            (({"method": m}, i[3]) for m, i in cache_info.items()),
+        ),
+        *metric_lines(
+            "falocalrepo_cache_invalidations_total",
+            "counter",
+            "Database cache invalidations caused by changes to the database file.",
+            [({}, metrics.cache_invalidations)],
+        ),
+        *metric_lines(
+            "falocalrepo_sqlite_queries_total",
+            "counter",
+            "SQLite statements by query shape.",
+            (({"shape": s}, q[0]) for s, q in metrics.queries.items()),
+        ),
+        *metric_lines(
+            "falocalrepo_sqlite_query_seconds_total",
+            "counter",
+            "SQLite execution time by query shape.",
+            (({"shape": s}, q[1]) for s, q in metrics.queries.items()),
+        ),
+        *metric_lines(
+            "falocalrepo_thumbnails_total",
+            "counter",
+            "Thumbnails served from stored files, resized from stored files, or generated from submission files.",
+            (({"source": s}, n) for s, n in metrics.thumbnails.items()),
+        ),
+        "# HELP falocalrepo_event_loop_lag_seconds Event loop scheduling delay.",
+        "# TYPE falocalrepo_event_loop_lag_seconds histogram",
+        *metrics.loop_lag.lines("falocalrepo_event_loop_lag_seconds", {}),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+async def monitor_loop_lag(interval: float = 0.5):
+    while True:
+        time_start: float = perf_counter()
+        await sleep(interval)
+        metrics.observe_loop_lag(max(0.0, perf_counter() - time_start - interval))
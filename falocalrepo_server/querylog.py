@@ -0,0 +1,53 @@
+from collections import deque
+from collections import namedtuple
+from datetime import datetime
+from sqlite3 import Connection
+from sqlite3 import DatabaseError
+from typing import Any
+from typing import Iterable
+
+SlowQuery = namedtuple("SlowQuery", ["time", "sql", "values", "duration", "rows", "plan"])
+
+
+def query_plan(connection: Connection, sql: str, values: Iterable | None) -> list[str]:
+    try:
+        rows: list[tuple[int, int, int, str]] = connection.execute(
+            f"explain query plan {sql}", list(values or [])
+        ).fetchall()
+    except DatabaseError:
+        return []
+    depths: dict[int, int] = {0: -1}
+    plan: list[str] = []
+    for node_id, parent_id, _, detail in rows:
+        depths[node_id] = depths.get(parent_id, -1) + 1
+        plan.append("  " * depths[node_id] + detail)
+    return plan
+
+
+class SlowQueryLog:
+    def __init__(self, threshold: float, size: int = 200):
+        self.threshold: float = threshold
+        self.entries: deque[SlowQuery] = deque(maxlen=size)
+
+    def observe(
+        self,
+        connection: Connection,
+        time: datetime,
+        sql: str,
+        values: Iterable | None,
+        duration: float,
+        rows: int | None,
+    ):
+        if duration < self.threshold:
+            return
+        values = list(values or [])
+        if self.entries and (last := self.entries[-1]).sql == sql and last.values == values and last.time >= time:
+            self.entries[-1] = last._replace(duration=max(duration, last.duration), rows=rows)
+        else:
+            self.entries.append(SlowQuery(time, sql, values, duration, rows, query_plan(connection, sql, values)))
+
+    def clear(self):
+        self.entries.clear()
+
+    def export(self) -> list[dict[str, Any]]:
+        return [e._asdict() | {"time": e.time.isoformat()} for e in reversed(self.entries)]
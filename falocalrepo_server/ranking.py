@@ -0,0 +1,66 @@
+from re import split
+
+from falocalrepo_database.tables import CommentsColumns
+from falocalrepo_database.tables import JournalsColumns
+from falocalrepo_database.tables import SubmissionsColumns
+from falocalrepo_database.tables import UsersColumns
+from falocalrepo_database.tables import comments_table
+from falocalrepo_database.tables import journals_table
+from falocalrepo_database.tables import submissions_table
+from falocalrepo_database.tables import users_table
+
+relevance_saturation: float = 1.2
+relevance_weights: dict[str, dict[str, float]] = {
+    users_table: {
+        UsersColumns.USERNAME.name: 4,
+        UsersColumns.FOLDERS.name: 1,
+        UsersColumns.USERPAGE.name: 1,
+    },
+    submissions_table: {
+        SubmissionsColumns.TITLE.name: 4,
+        SubmissionsColumns.TAGS.name: 3,
+        SubmissionsColumns.SPECIES.name: 2,
+        SubmissionsColumns.CATEGORY.name: 2,
+        SubmissionsColumns.AUTHOR.name: 2,
+        SubmissionsColumns.DESCRIPTION.name: 1,
+    },
+    journals_table: {
+        JournalsColumns.TITLE.name: 4,
+        JournalsColumns.AUTHOR.name: 2,
+        JournalsColumns.CONTENT.name: 1,
+    },
+    comments_table: {
+        CommentsColumns.AUTHOR.name: 2,
+        CommentsColumns.TEXT.name: 1,
+    },
+}
+
+
+def like_to_text(value: str) -> str | None:
+    parts: list[str] = split(r"(\\.|[%_])", value.strip("%"))
+    if any(p in ("%", "_") for p in parts):
+        return None
+    return "".join(p[1:] if p.startswith("\\") else p for p in parts)
+
+
+def term_score_sql(column: str, weight: float, value: str) -> tuple[str, list[str]] | None:
+    if not value.strip("%"):
+        return None
+    elif (text := like_to_text(value)) is None:
+        return f"{weight} * ifnull(lower({column}) like ? escape '\\', 0)", ["%" + value.strip("%") + "%"]
+    return (
+        f"ifnull((select {round(weight * (relevance_saturation + 1), 6)} * n / (n + {relevance_saturation}) from"
+        f" (select (length(l) - length(replace(l, ?, ''))) / {len(text)} as n from"
+        f" (select lower({column}) as l) where instr(l, ?))), 0)",
+        [text, text],
+    )
+
+
+def relevance_sql(table_name: str, terms: list[tuple[str, str]]) -> tuple[str, list[str]]:
+    scores: list[tuple[str, list[str]]] = [
+        score
+        for field, value in terms
+        for column, weight in relevance_weights[table_name.upper()].items()
+        if field in ("any", column.lower()) and (score := term_score_sql(column, weight, value))
+    ]
+    return f"({' + '.join(sql for sql, _ in scores) or '0'})", [v for _, values in scores for v in values]
@@ -0,0 +1,58 @@
+from re import compile as re_compile
+from re import Pattern
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+
+from uvicorn import run
+
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+
+host_pattern: Pattern = re_compile(r"(\[[0-9A-Fa-f:.]+]|[A-Za-z0-9.-]+)(:\d+)?")
+redirect_limit_concurrency: int = 4096
+redirect_backlog: int = 4096
+redirect_keep_alive: int = 2
+
+
+class RedirectApp:
+    def __init__(self, host: str, port: int):
+        self.host: str = host
+        self.port_suffix: str = "" if port == 443 else f":{port}"
+
+    async def __call__(self, scope: dict[str, Any], receive: Receive, send: Send):
+        if scope["type"] == "http":
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 301,
+                    "headers": [(b"location", self.location(scope).encode()), (b"content-length", b"0")],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+        elif scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1008})
+
+    def location(self, scope: dict[str, Any]) -> str:
+        host: str = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"host"), "")
+        host = m[1] if (m := host_pattern.fullmatch(host)) else self.host
+        path: str = scope.get("raw_path", b"").decode("latin-1") or scope["path"]
+        query: str = scope["query_string"].decode("latin-1")
+        return f"https://{host}{self.port_suffix}{path}{'?' if query else ''}{query}"
+
+
+def redirect(host: str, port: int, redirect_port: int):
+    run(
+        RedirectApp("localhost" if host == "0.0.0.0" else host, redirect_port),
+        host=host,
+        port=port,
+        http="h11",
+        lifespan="off",
+        access_log=False,
+        proxy_headers=False,
+        server_header=False,
+        date_header=False,
+        limit_concurrency=redirect_limit_concurrency,
+        backlog=redirect_backlog,
+        timeout_keep_alive=redirect_keep_alive,
+    )
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+from os import fsync
+from pathlib import Path
+from re import match
+from sqlite3 import Connection
+
+from falocalrepo_database.tables import SubmissionsColumns
+from falocalrepo_database.tables import submissions_table
+from orjson import dumps
+from orjson import loads
+
+from falocalrepo_server.fileindex import file_index_tiers
+from falocalrepo_server.fileindex import file_index_workers
+from falocalrepo_server.fileindex import tier_folders
+from falocalrepo_server.fileindex import tier_level
+
+reorder_journal_name: str = ".reorder-journal"
+reorder_temp_name: str = ".reorder-temp"
+
+
+def reorder_steps(moves: dict[str, str | None]) -> list[tuple[str, str | None]]:
+    steps: list[tuple[str, str | None]] = [(src, None) for src, dst in moves.items() if dst is None]
+    pending: dict[str, str] = {src: dst for src, dst in moves.items() if dst is not None and src != dst}
+    while pending:
+        if (src := next((s for s, d in pending.items() if d not in pending), None)) is None:
+            src = next(iter(pending))
+            steps.append((src, reorder_temp_name))
+            pending[reorder_temp_name] = pending.pop(src)
+            continue
+        steps.append((src, pending.pop(src)))
+    return steps
+
+
+def run_steps(folder: Path, steps: list[tuple[str, str | None]], start: int = 0):
+    with folder.joinpath(reorder_journal_name).open("ab") as journal:
+        for n, (src, dst) in enumerate(steps[start:], start):
+            if dst is None:
+                folder.joinpath(src).unlink(missing_ok=True)
+            elif folder.joinpath(src).exists():
+                folder.joinpath(src).replace(folder.joinpath(dst))
+            journal.write(b"%d\n" % n)
+            journal.flush()
+    folder.joinpath(reorder_journal_name).unlink()
+
+
+def resume_reorder(folder: Path) -> bool:
+    if not (journal := folder.joinpath(reorder_journal_name)).is_file():
+        return False
+    header, *done = journal.read_bytes().split(b"\n")
+    try:
+        steps: list[tuple[str, str | None]] = [tuple(s) for s in loads(header)]
+    except ValueError:
+        journal.unlink()
+        return False
+    run_steps(folder, steps, int(done[-2]) + 1 if len(done) > 1 else 0)
+    return True
+
+
+def reorder_files(folder: Path, moves: dict[Path, Path | None]):
+    if not (steps := reorder_steps({src.name: dst.name if dst else None for src, dst in moves.items()})):
+        return
+    with folder.joinpath(reorder_journal_name).open("wb") as journal:
+        journal.write(dumps(steps) + b"\n")
+        journal.flush()
+        fsync(journal.fileno())
+    run_steps(folder, steps)
+
+
+def folder_file_ext(folder: Path) -> list[str]:
+    files: dict[int, str] = {
+        int(m[1] or 0): f.suffix.removeprefix(".")
+        for f in folder.iterdir()
+        if f.is_file() and (m := match(r"^submission(\d*)$", f.stem))
+    }
+    return [files[n] for n in sorted(files)]
+
+
+def reconcile_file_ext(connection: Connection, submission_id: int, folder: Path) -> list[str]:
+    file_ext: list[str] = folder_file_ext(folder)
+    with connection:
+        connection.execute(
+            f"update {submissions_table} set FILEEXT = ? where ID = ?",
+            [SubmissionsColumns.FILEEXT.to_entry(file_ext), submission_id],
+        )
+    return file_ext
+
+
+def find_reorders(folder: str, prefix: str, depth: int) -> list[int]:
+    if depth == file_index_tiers:
+        return [int(prefix)] if Path(folder, reorder_journal_name).is_file() else []
+    return [i for e in tier_folders(folder) for i in find_reorders(e.path, prefix + e.name, depth + 1)]
+
+
+def pending_reorders(files_folder: Path, workers: int = file_index_workers) -> list[int]:
+    level, depth = tier_level(files_folder, workers)
+    with ThreadPoolExecutor(workers) as executor:
+        return [i for ids in executor.map(lambda f: find_reorders(f[0], f[1], depth), level) for i in ids]
@@ -0,0 +1,93 @@
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import RLock
+from types import MethodType
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import Sequence
+
+from falocalrepo_server.columnar import ColumnarRows
+
+
+def sort_value(value: Any) -> tuple:
+    if value is None:
+        return (0,)
+    elif isinstance(value, (int, float)):
+        return 1, value
+    elif isinstance(value, str):
+        return 2, value
+    return 3, value
+
+
+class SortKey:
+    __slots__ = ("values", "descending")
+
+    def __init__(self, values: tuple, descending: list[bool]):
+        self.values: tuple = tuple(map(sort_value, values))
+        self.descending: list[bool] = descending
+
+    def __lt__(self, other: "SortKey") -> bool:
+        for a, b, descending in zip(self.values, other.values, self.descending):
+            if a != b:
+                return b < a if descending else a < b
+        return False
+
+
+def insert_sorted(
+    rows: ColumnarRows,
+    row: Sequence,
+    row_key: SortKey,
+    key: Callable[[Any], SortKey],
+) -> ColumnarRows:
+    return rows.insert(bisect_right(range(len(rows)), row_key, key=lambda i: key(rows[i])), row)
+
+
+class ResultCache:
+    def __init__(self, func: Callable, maxsize: int = 128):
+        self.__wrapped__: Callable = func
+        self.__name__: str = func.__name__
+        self.maxsize: int = maxsize
+        self.entries: OrderedDict[tuple, Any] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock: RLock = RLock()
+
+    def __get__(self, instance: Any, owner: type | None = None):
+        return self if instance is None else MethodType(self, instance)
+
+    def __call__(self, instance: Any, *args: Any) -> Any:
+        key: tuple = (instance, *args)
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        result: Any = self.__wrapped__(instance, *args)
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = result
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return result
+
+    def items(self, instance: Any) -> Iterator[tuple[tuple, Any]]:
+        with self.lock:
+            return iter([(k[1:], v) for k, v in self.entries.items() if k[0] is instance])
+
+    def replace(self, instance: Any, args: tuple, result: Any | None):
+        with self.lock:
+            if (key := (instance, *args)) not in self.entries:
+                return
+            elif result is None:
+                del self.entries[key]
+            else:
+                self.entries[key] = result
+
+    def cache_clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def cache_info(self) -> tuple[int, int, int, int]:
+        return self.hits, self.misses, self.maxsize, len(self.entries)
@@ -1,3 +1,7 @@
+from asyncio import Future
+from asyncio import create_task
+from asyncio import get_running_loop
+from asyncio import sleep
 from base64 import b64decode
 from base64 import b64encode
 from contextlib import asynccontextmanager
@@ -5,31 +9,32 @@ from copy import deepcopy
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
+from functools import lru_cache
+from functools import partial
 from functools import reduce
-from hashlib import sha256
 from io import BytesIO
 from logging import getLogger
 from logging import Logger
 from math import ceil
 from os import PathLike
 from pathlib import Path
-from re import compile as re_compile
-from re import IGNORECASE
 from re import match
-from re import MULTILINE
-from re import Pattern
 from re import sub as re_sub
 from secrets import compare_digest
+from sqlite3 import Cursor
+from sqlite3 import DatabaseError
+from threading import get_ident
+from time import perf_counter
 from traceback import format_exc
 from typing import Any
+from typing import AsyncIterator
+from typing import Callable
 from typing import Mapping
 from webbrowser import open as open_browser
 from zipfile import ZipFile
-from shutil import copy2
 
 from baize.asgi import FileResponse
 from bs4 import BeautifulSoup
-from chardet import detect as detect_encoding
 
 # noinspection PyProtectedMember
 from falocalrepo_database import __package__ as __package_database__
@@ -54,22 +59,35 @@ from starlette.middleware import Middleware
 from starlette.middleware.authentication import AuthenticationMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.base import RequestResponseEndpoint
-from starlette.middleware.sessions import SessionMiddleware
 from starlette.requests import HTTPConnection
 from starlette.requests import Request
 from starlette.responses import HTMLResponse
 from starlette.responses import RedirectResponse
 from starlette.responses import Response
+from starlette.responses import PlainTextResponse
 from starlette.responses import StreamingResponse
 from starlette.routing import BaseRoute
 from starlette.routing import Mount
 from starlette.routing import Route
 from starlette.staticfiles import StaticFiles
 from starlette.templating import Jinja2Templates
+from starlette.types import ASGIApp
 from starlette.types import ExceptionHandler
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
 from uvicorn import run
 
 from .__version__ import __version__
+from .auth import auth_secret
+from .auth import auth_token_max_age
+from .auth import AuthToken
+from .auth import IPAllowlist
+from .auth import SessionCookieMiddleware
+from .bulkedit import BulkPatch
+from .bulkedit import bulk_edit
+from .bulkedit import parse_bulk_patch
 from .database import clean_username
 from .database import Database
 from .database import default_order
@@ -78,6 +96,37 @@ from .database import journals_table
 from .database import Settings
 from .database import submissions_table
 from .database import users_table
+from .deletion import FileReaper
+from .deletion import find_orphans
+from .deletion import orphans_size
+from .deletion import remove_files
+from .deletion import settled_orphans
+from .fileindex import submission_folder
+from .jobs import Job
+from .jobs import JobContext
+from .jobs import JobQueue
+from .jobs import job_priority_maintenance
+from .metrics import metrics
+from .metrics import monitor_loop_lag
+from .metrics import render_metrics
+from .reorder import pending_reorders
+from .reorder import reconcile_file_ext
+from .reorder import reorder_files
+from .reorder import resume_reorder
+from .snapshot import Snapshot
+from .suggestions import suggestions_kinds
+from .timing import profile_thread
+from .timing import server_timing
+from .timing import start_timings
+from .timing import timer
+from .timing import Timings
+from .timing import timings_dict
+from .tuning import SQLiteTuning
+from .tuning import optimize
+from .tuning import tuning_status
+from .uploads import upload_form
+from .uploads import UploadWriter
+from .useragent import is_user_agent_mobile
 
 default_search_settings: Settings = {
     "view": {users_table: "grid", submissions_table: "grid", journals_table: "list", comments_table: "list"},
@@ -85,55 +134,49 @@ default_search_settings: Settings = {
     "sort": default_sort,
     "order": default_order,
 }
-mobile_user_agent_pattern_a = re_compile(
-    r"(android|bb\\d+|meego).+mobile|avantgo|bada\\/|blackberry|blazer|compal|elaine|fennec|hiptop|iemobile|"
-    r"ip(hone|od)|iris|kindle|lge |maemo|midp|mmp|mobile.+firefox|netfront|opera m(ob|in)i|palm( os)?|phone|p(ixi|re)"
-    r"\\/|plucker|pocket|psp|series([46])0|symbian|treo|up\\.(browser|link)|vodafone|wap|windows ce|xda|xiino",
-    IGNORECASE | MULTILINE,
-)
-mobile_user_agent_pattern_b = re_compile(
-    r"1207|6310|6590|3gso|4thp|50[1-6]i|770s|802s|a wa|abac|ac(er|oo|s\\-)|ai(ko|rn)|al(av|ca|co)|amoi|an(ex|ny|yw)"
-    r"|aptu|ar(ch|go)|as(te|us)|attw|au(di|\\-m|r |s )|avan|be(ck|ll|nq)|bi(lb|rd)|bl(ac|az)|br([ev])w|bumb|bw\\-([nu])"
-    r"|c55\\/|capi|ccwa|cdm\\-|cell|chtm|cldc|cmd\\-|co(mp|nd)|craw|da(it|ll|ng)|dbte|dc\\-s|devi|dica|dmob|do([cp])o|"
-    r"ds(12|\\-d)|el(49|ai)|em(l2|ul)|er(ic|k0)|esl8|ez([4-7]0|os|wa|ze)|fetc|fly(\\-|_)|g1 u|g560|gene|gf\\-5|g\\-mo"
-    r"|go(\\.w|od)|gr(ad|un)|haie|hcit|hd\\-([mpt])|hei\\-|hi(pt|ta)|hp( i|ip)|hs\\-c|ht(c(\\-| |_|a|g|p|s|t)|tp)|"
-    r"hu(aw|tc)|i\\-(20|go|ma)|i230|iac( |\\-|\\/)|ibro|idea|ig01|ikom|im1k|inno|ipaq|iris|ja([tv])a|jbro|jemu|jigs|"
-    r"kddi|keji|kgt( |\\/)|klon|kpt |kwc\\-|kyo([ck])|le(no|xi)|lg( g|\\/([klu])|50|54|\\-[a-w])|libw|lynx|m1\\-w|m3ga|"
-    r"m50\\/|ma(te|ui|xo)|mc(01|21|ca)|m\\-cr|me(rc|ri)|mi(o8|oa|ts)|mmef|mo(01|02|bi|de|do|t(\\-| |o|v)|zz)|"
-    r"mt(50|p1|v )|mwbp|mywa|n10[0-2]|n20[2-3]|n30([02])|n50([025])|n7(0([01])|10)|ne(([cm])\\-|on|tf|wf|wg|wt)|"
-    r"nok([6i])|nzph|o2im|op(ti|wv)|oran|owg1|p800|pan([adt])|pdxg|pg(13|\\-([1-8]|c))|phil|pire|pl(ay|uc)|pn\\-2|"
-    r"po(ck|rt|se)|prox|psio|pt\\-g|qa\\-a|qc(07|12|21|32|60|\\-[2-7]|i\\-)|qtek|r380|r600|raks|rim9|ro(ve|zo)|s55\\/|"
-    r"sa(ge|ma|mm|ms|ny|va)|sc(01|h\\-|oo|p\\-)|sdk\\/|se(c(\\-|0|1)|47|mc|nd|ri)|sgh\\-|shar|sie(\\-|m)|sk\\-0|"
-    r"sl(45|id)|sm(al|ar|b3|it|t5)|so(ft|ny)|sp(01|h\\-|v\\-|v )|sy(01|mb)|t2(18|50)|t6(00|10|18)|ta(gt|lk)|tcl\\-|"
-    r"tdg\\-|tel([im])|tim\\-|t\\-mo|to(pl|sh)|ts(70|m\\-|m3|m5)|tx\\-9|up(\\.b|g1|si)|utst|v400|v750|veri|vi(rg|te)|"
-    r"vk(40|5[0-3]|\\-v)|vm40|voda|vulc|vx(52|53|60|61|70|80|81|83|85|98)|w3c(\\-| )|webc|whit|wi(g |nc|nw)|wmlb|wonu|"
-    r"x700|yas\\-|your|zeto|zte\\-",
-    IGNORECASE | MULTILINE,
-)
+job_kinds_manual: tuple[str, ...] = ("recount_stats", "scan_files", "scan_orphans", "resume_reorders", "optimize")
+orphans_chunk_size: int = 500
+bulk_edit_poll_interval: float = 0.1
 logger: Logger = getLogger("uvicorn")
 root: Path = Path(__file__).resolve().parent
-templates: Jinja2Templates = Jinja2Templates(
-    str(root / "templates"),
-    context_processors=[
-        lambda r: {
-            "version": __version__,
-            "is_mobile": is_request_mobile(r),
-        },
-    ],
-)
-templates.env.filters["clean_broken_tags"] = lambda text: re_sub(r"<[^>]*$", "", text)
-templates.env.filters["prettify_html"] = lambda text: (
-    (b := BeautifulSoup(text, "lxml")).select_one("body") or b
-).decode_contents()
+
+
+@lru_cache
+def get_templates() -> Jinja2Templates:
+    templates: Jinja2Templates = Jinja2Templates(
+        str(root / "templates"),
+        context_processors=[
+            lambda r: {
+                "version": __version__,
+                "is_mobile": is_request_mobile(r),
+            },
+        ],
+    )
+    templates.env.filters["clean_broken_tags"] = lambda text: re_sub(r"<[^>]*$", "", text)
+    templates.env.filters["prettify_html"] = lambda text: (
+        (b := BeautifulSoup(text, "lxml")).select_one("body") or b
+    ).decode_contents()
+    return templates
 
 
 def is_request_mobile(request: Request) -> bool | None:
     user_agent: str | None = request.headers.get("user-agent")
-    return (
-        None
-        if not user_agent
-        else bool(mobile_user_agent_pattern_a.search(user_agent) or mobile_user_agent_pattern_b.search(user_agent[:4]))
-    )
+    if not user_agent:
+        return None
+    return is_user_agent_mobile(user_agent)
+
+
+class IndexedFileResponse(FileResponse):
+    def __init__(self, filepath: str, on_error: Callable[[], Any], **kwargs: Any):
+        super().__init__(filepath, **kwargs)
+        self.on_error: Callable[[], Any] = on_error
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            await super().__call__(scope, receive, send)
+        except Exception:
+            self.on_error()
+            raise
 
 
 class TemplateResponse(HTMLResponse):
@@ -147,8 +190,10 @@ class TemplateResponse(HTMLResponse):
         media_type: str | None = None,
         background: BackgroundTask | None = None,
     ):
+        templates: Jinja2Templates = get_templates()
         context |= reduce(lambda c, p: c | p(request), templates.context_processors, {}) | {"request": request}
-        content: str = templates.get_template(template_name).render(context)
+        with timer("template", template_name):
+            content: str = templates.get_template(template_name).render(context)
         super().__init__(content, status_code, headers, media_type, background)
 
 
@@ -158,11 +203,79 @@ class CacheMiddleware(BaseHTTPMiddleware):
         return await call_next(request)
 
 
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, routes: list[BaseRoute]):
+        self.app: ASGIApp = app
+        self.routes: dict[Any, str] = {}
+        for route in reversed(routes):
+            if isinstance(route, Route):
+                self.routes[route.endpoint] = route.path
+            elif isinstance(route, Mount):
+                self.routes[route.app] = route.path + "/{path}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        time_start: float = perf_counter()
+        status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.observe_request(
+                scope["method"],
+                self.routes.get(scope.get("endpoint"), "unmatched"),
+                status_code,
+                perf_counter() - time_start,
+            )
+
+
+class TimingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        timings: Timings = start_timings()
+        time_start: float = perf_counter()
+        response: Response = await call_next(request)
+        total: float = perf_counter() - time_start
+        response.headers["Server-Timing"] = server_timing(timings, total)
+        logger.info(
+            "Timing "
+            + dumps(
+                {
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": response.status_code,
+                    "duration": round(total * 1000, 3),
+                    "timings": timings_dict(timings),
+                }
+            ).decode()
+        )
+        return response
+
+
 class NoAuthBackend(AuthenticationBackend):
     async def authenticate(self, conn: HTTPConnection):
         return AuthCredentials(["authenticated", "editor"]), SimpleUser("")
 
 
+class ReadOnlyAuthBackend(AuthenticationBackend):
+    def __init__(self, backend: AuthenticationBackend):
+        self.backend: AuthenticationBackend = backend
+        super().__init__()
+
+    async def authenticate(self, conn: HTTPConnection):
+        if (result := await self.backend.authenticate(conn)) is None:
+            return None
+        credentials, user = result
+        return AuthCredentials([s for s in credentials.scopes if s != "editor"]), user
+
+
 class BasicAuthBackend(AuthenticationBackend):
     def __init__(
         self,
@@ -171,10 +284,9 @@ class BasicAuthBackend(AuthenticationBackend):
         editors: tuple[str, ...] | None,
     ):
         self.auth: dict[str, str] = dict(auth)
-        self.allowed_ips: list[Pattern] = [
-            re_compile(ip.replace(".", r"\.").replace("*", r".*")) for ip in allowed_ips or []
-        ]
-        self.editors: tuple[str, ...] | None = editors
+        self.allowed_ips: IPAllowlist = IPAllowlist(allowed_ips)
+        self.editors: tuple[str, ...] = editors or ()
+        self.tokens: AuthToken = AuthToken(auth_secret(auth), auth_token_max_age)
         super().__init__()
 
     @staticmethod
@@ -185,14 +297,27 @@ class BasicAuthBackend(AuthenticationBackend):
             headers={"WWW-Authenticate": "Basic"},
         )
 
+    def credentials(self, username: str) -> tuple[AuthCredentials, SimpleUser]:
+        return (
+            AuthCredentials(["authenticated", "editor"] if username in self.editors else ["authenticated"]),
+            SimpleUser(username),
+        )
+
     async def authenticate(self, conn: HTTPConnection):
-        if any(ip.match(conn.client.host) for ip in self.allowed_ips):
+        if self.allowed_ips and self.allowed_ips.allowed(conn.client.host if conn.client else None):
             return AuthCredentials(["authenticated", "editor", "whitelist"]), SimpleUser("")
 
         if conn.session.pop("logout", None):
             conn.session.pop("auth", None)
             raise AuthenticationError("Logged out")
-        elif not (auth := conn.headers.get("Authorization", conn.session.get("auth"))):
+        elif (token := conn.session.get("auth")) and (verified := self.tokens.verify(token)):
+            username, remaining = verified
+            if username in self.auth:
+                if remaining < self.tokens.max_age // 2:
+                    conn.session["auth"] = self.tokens.sign(username)
+                return self.credentials(username)
+
+        if not (auth := conn.headers.get("Authorization")):
             raise AuthenticationError("Missing credentials")
 
         try:
@@ -206,11 +331,8 @@ class BasicAuthBackend(AuthenticationBackend):
         username, _, password = decoded.partition(":")
 
         if username in self.auth and compare_digest(password, self.auth[username]):
-            conn.session.update(auth=auth)
-            credentials = AuthCredentials(["authenticated"])
-            if username in self.editors:
-                credentials.scopes.append("editor")
-            return credentials, SimpleUser(username)
+            conn.session["auth"] = self.tokens.sign(username)
+            return self.credentials(username)
 
         conn.session.pop("auth", None)
         raise AuthenticationError("Invalid basic auth credentials")
@@ -230,12 +352,7 @@ def merge_settings(a: Settings, b: dict[str, dict[str, str | int]]) -> Settings:
 
 
 def is_mobile(request: Request):
-    user_agent: str | None = request.headers.get("user-agent")
-    if not user_agent:
-        request.state.is_mobile = None
-    request.state.is_mobile = (
-        mobile_user_agent_pattern_a.search(user_agent) or mobile_user_agent_pattern_b.search(user_agent[:4]),
-    )
+    request.state.is_mobile = is_request_mobile(request)
 
 
 def encode_search_id(table_name: str, query: str, sort: str, order: str) -> str:
@@ -268,6 +385,72 @@ def decode_search_id(encoded_search_id: str) -> tuple[str | None, tuple[str, str
     return search_id, search_terms, search_index
 
 
+def bulk_edit_job(job: JobContext, params: dict[str, Any]) -> dict[str, int]:
+    changed: int = 0
+    for done, changed in bulk_edit(job.connection, params["table"], params["ids"], params["patch"]):
+        job.progress(done, len(params["ids"]), {"total": len(params["ids"]), "changed": changed})
+    return {"total": len(params["ids"]), "changed": changed}
+
+
+def scan_files_job(database: Database, _job: JobContext, _params: dict[str, Any]) -> dict[str, Any]:
+    database.file_index.scan()
+    return database.file_index.status()
+
+
+def scan_orphans_job(database: Database, files_folder: Path, job: JobContext, params: dict[str, Any]) -> dict[str, Any]:
+    orphans: list[tuple[int, Path]] = find_orphans(job.connection, files_folder)
+    result: dict[str, Any] = {
+        "orphans": len(orphans),
+        "size": orphans_size(orphans),
+        "reclaimed": 0,
+        "skipped": 0,
+        "files": [str(f) for _, f in orphans[:100]],
+    }
+    if params.get("reclaim") != "true":
+        return result
+    orphans = settled_orphans(orphans)
+    result["skipped"] = result["orphans"] - len(orphans)
+    job.progress(0, len(orphans))
+    for n in range(0, len(orphans), orphans_chunk_size):
+        chunk: list[tuple[int, Path]] = orphans[n : n + orphans_chunk_size]
+        result["reclaimed"] += remove_files(f for _, f in chunk)
+        for submission_id in {i for i, _ in chunk}:
+            database.refresh_files(submission_id)
+        job.progress(n + len(chunk))
+    return result
+
+
+def resume_reorders_job(
+    database: Database, files_folder: Path, job: JobContext, _params: dict[str, Any]
+) -> dict[str, Any]:
+    resumed: list[int] = []
+    for submission_id in pending_reorders(files_folder):
+        if resume_reorder(folder := submission_folder(files_folder, submission_id)):
+            reconcile_file_ext(job.connection, submission_id, folder)
+            database.refresh_files(submission_id)
+            resumed.append(submission_id)
+    return {"resumed": resumed}
+
+
+def make_jobs(database_path: Path, database: Database) -> JobQueue:
+    jobs: JobQueue = JobQueue(database_path, tuning=database.tuning)
+    jobs.register("recount_stats", lambda _job, _params: database.recount_stats())
+    jobs.register("optimize", lambda job, _params: optimize(job.connection))
+    jobs.register("bulk_edit", bulk_edit_job)
+    if database.file_index:
+        jobs.register("scan_files", partial(scan_files_job, database))
+    jobs.register("scan_orphans", partial(scan_orphans_job, database, database.files_folder()))
+    jobs.register("resume_reorders", partial(resume_reorders_job, database, database.files_folder()))
+    return jobs
+
+
+async def schedule_optimize(jobs: JobQueue, interval: int):
+    while True:
+        await sleep(interval)
+        if not jobs.active("optimize"):
+            jobs.submit("optimize", priority=job_priority_maintenance)
+
+
 def make_lifespan(
     database_path: Path,
     use_cache: bool,
@@ -276,24 +459,68 @@ def make_lifespan(
     ssl: bool,
     authentication: bool,
     browser: bool,
+    slow_query_time: float | None = None,
+    file_index: bool = False,
+    snapshot_interval: int | None = None,
+    sqlite_tuning: SQLiteTuning | None = None,
+    stats_counters: bool = False,
 ):
     @asynccontextmanager
     async def _lifespan(_app: Starlette):
         logger.info(f"Using {__package__.replace('_', '-')}: {__version__}")
         logger.info(f"Using {__package_database__.replace('_', '-')}: {__version_database__}")
-        with Database(database_path, use_cache, max_results) as database:
+        snapshot: Snapshot | None = Snapshot(database_path, snapshot_interval) if snapshot_interval else None
+        if snapshot:
+            snapshot.start()
+        with Database(database_path, use_cache, max_results, slow_query_time, snapshot, sqlite_tuning) as database:
             logger.info(
                 f"Using database: {database_path} ({database.database.version})"
                 + (" (cache)" if use_cache else "")
                 + (" (BBCode)" if database.database.settings.bbcode else "")
             )
+            if snapshot:
+                logger.info(f"Using read-only snapshot: {snapshot.path} (refreshed every {snapshot.interval}s)")
+            if sqlite_tuning:
+                logger.info(f"Using SQLite settings: {tuning_status(database.database.connection)}")
             if ssl:
                 logger.info("Using HTTPS")
             if authentication:
                 logger.info("Using HTTP Basic authentication")
+            if stats_counters and database.setup_stats():
+                logger.info("Using statistics counters")
+            if file_index:
+                logger.info(f"Using file index: {database.setup_file_index().path}")
+            jobs: JobQueue = make_jobs(database_path, database)
+            jobs.start()
+            logger.info(f"Using job store: {jobs.store_path or 'memory'}")
+            reaper: FileReaper = FileReaper()
+            reaper.start()
+            if not snapshot and not jobs.active("resume_reorders"):
+                jobs.submit("resume_reorders", priority=job_priority_maintenance)
+            if database.file_index and not database.file_index.scanned and not jobs.active("scan_files"):
+                jobs.submit("scan_files", priority=job_priority_maintenance)
+            database.suggestion_index()
+            get_templates()
+            loop_lag_monitor: Future = create_task(monitor_loop_lag())
+            optimize_scheduler: Future | None = None
+            if sqlite_tuning and sqlite_tuning.optimize_interval:
+                optimize_scheduler = create_task(schedule_optimize(jobs, sqlite_tuning.optimize_interval))
             if browser:
                 open_browser(address)
-            yield {"database": database, "authentication": bool(authentication)}
+            try:
+                yield {
+                    "database": database,
+                    "jobs": jobs,
+                    "reaper": reaper,
+                    "snapshot": snapshot,
+                    "authentication": bool(authentication),
+                }
+            finally:
+                loop_lag_monitor.cancel()
+                if optimize_scheduler:
+                    optimize_scheduler.cancel()
+                jobs.stop()
+                reaper.stop()
 
     return _lifespan
 
@@ -392,6 +619,11 @@ async def search_response(
     if (page - 1) * limit > len(results.rows):
         page = ceil(len(results.rows) / limit) or 1
 
+    if table_name == submissions_table:
+        database.prefetch_submission_files(
+            r[results.column_id] for r in results.rows[(page - 1) * limit : page * limit]
+        )
+
     return TemplateResponse(
         request,
         "pages/search.j2",
@@ -407,6 +639,7 @@ async def search_response(
             "change_view": table_name in (users_table, submissions_table),
             "thumbnails": table_name in (users_table, submissions_table),
             "results": results,
+            "facets": database.facets(table_name, sql_query) if table_name == submissions_table else {},
             "page": page,
             "offset": (page - 1) * limit,
             "limit": limit,
@@ -416,6 +649,107 @@ async def search_response(
     )
 
 
+async def stream_ndjson(cursor: Cursor, size: int = 1000) -> AsyncIterator[bytes]:
+    columns: list[str] = [c[0] for c in cursor.description]
+    try:
+        while rows := cursor.fetchmany(size):
+            yield b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+            await sleep(0)
+    finally:
+        cursor.close()
+
+
+@requires(["authenticated"])
+async def api_search(request: Request):
+    table_name: str = request.path_params["table"].upper()
+    database: Database = request.state.database
+    search_settings: Settings = merge_settings(default_search_settings, database.settings() or {})
+
+    query: str = request.query_params.get("query", request.query_params.get("q", "")).strip()
+    sort: str = request.query_params.get("sort", search_settings["sort"][table_name]).lower()
+    order: str = request.query_params.get("order", search_settings["order"][table_name]).lower()
+    offset: int = max(0, int(request.query_params.get("offset", 0)))
+    limit: int = max(0, int(request.query_params.get("limit", 0)))
+
+    try:
+        if "application/x-ndjson" in request.headers.get("accept", ""):
+            if database.max_results and offset >= database.max_results:
+                return Response(b"", media_type="application/x-ndjson")
+            cursor, _ = database.search_cursor(table_name, query, sort, order, offset, limit)
+            return StreamingResponse(stream_ndjson(cursor), media_type="application/x-ndjson")
+        results = database.search(table_name, query, sort, order)
+    except DatabaseError as err:
+        return Response(dumps({"error": " ".join(map(str, err.args))}), 400, media_type="application/json")
+
+    rows: list = results.rows[: database.max_results] if database.max_results else results.rows
+
+    return Response(
+        dumps(
+            {
+                "table": table_name.lower(),
+                "query": query,
+                "sort": results.sort,
+                "order": results.order,
+                "total": len(rows),
+                "truncated": len(rows) < len(results.rows),
+                "offset": offset,
+                "limit": limit,
+                "results": [
+                    dict(zip(row.keys(), row)) for row in (rows[offset : offset + limit] if limit else rows[offset:])
+                ],
+            }
+        ),
+        media_type="application/json",
+    )
+
+
+def bulk_edit_progress(job: Job) -> bytes:
+    if job.status in ("failed", "cancelled"):
+        return dumps({"error": job.error or f"Bulk edit {job.status}"}) + b"\n"
+    return (
+        dumps({"done": job.progress, "total": job.total or 0, "changed": (job.result or {}).get("changed", 0)}) + b"\n"
+    )
+
+
+async def stream_bulk_edit(jobs: JobQueue, job_id: int) -> AsyncIterator[bytes]:
+    line: bytes = b""
+    try:
+        while True:
+            job: Job = jobs.jobs[job_id]
+            if (job.total is not None or job.status not in ("queued", "running")) and (
+                progress := bulk_edit_progress(job)
+            ) != line:
+                yield (line := progress)
+            if job.status not in ("queued", "running"):
+                break
+            await sleep(bulk_edit_poll_interval)
+    finally:
+        if jobs.jobs[job_id].status in ("queued", "running"):
+            jobs.cancel(job_id)
+
+
+@requires(["authenticated", "editor"])
+async def api_bulk_edit(request: Request):
+    table_name: str = request.path_params["table"].upper()
+    database: Database = request.state.database
+    jobs: JobQueue = request.state.jobs
+    query: str = request.query_params.get("query", request.query_params.get("q", "")).strip()
+
+    try:
+        patch: BulkPatch = parse_bulk_patch(table_name, loads(await request.body()))
+        job: Job = jobs.submit(
+            "bulk_edit",
+            {"table": table_name, "query": query, "patch": patch, "ids": database.search_ids(table_name, query)},
+            int(request.query_params.get("priority", 0)),
+        )
+    except (ValueError, DatabaseError) as err:
+        return Response(dumps({"error": " ".join(map(str, err.args))}), 400, media_type="application/json")
+
+    if request.query_params.get("background", "").lower() in ("1", "true", "yes"):
+        return job_response(request, job, status.HTTP_202_ACCEPTED)
+    return StreamingResponse(stream_bulk_edit(jobs, job.id), media_type="application/x-ndjson")
+
+
 @requires(["authenticated"])
 async def search(request: Request):
     if search_terms := decode_search_id(request.query_params.get("sid", ""))[1]:
@@ -430,6 +764,160 @@ async def search(request: Request):
     return await search_response(request, request.path_params["table"])
 
 
+@requires(["authenticated"])
+async def suggest(request: Request):
+    if (kind := request.path_params["kind"].lower()) not in suggestions_kinds:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Suggestions for {kind!r} not found.")
+
+    database: Database = request.state.database
+    prefix: str = request.query_params.get("q", "").strip()
+    limit: int = max(1, min(int(request.query_params.get("limit", 10)), 100))
+    index = database.suggestion_index()
+
+    return Response(
+        dumps([{"value": v, "count": c} for v, c in index.search(kind, prefix, limit)] if index and prefix else []),
+        media_type="application/json",
+    )
+
+
+@requires(["authenticated"])
+async def metrics_endpoint(request: Request):
+    database: Database = request.state.database
+    return PlainTextResponse(
+        render_metrics(database.cache_statistics()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@requires(["authenticated", "editor"])
+async def slow_queries(request: Request):
+    database: Database = request.state.database
+    if request.query_params.get("format") == "json":
+        return Response(
+            dumps(database.slow_queries.export() if database.slow_queries else []),
+            media_type="application/json",
+            headers={"Content-Disposition": 'attachment; filename="slow-queries.json"'},
+        )
+    return TemplateResponse(
+        request,
+        "pages/queries.j2",
+        {
+            "queries": list(reversed(database.slow_queries.entries)) if database.slow_queries else None,
+            "threshold": database.slow_queries.threshold if database.slow_queries else None,
+        },
+    )
+
+
+@requires(["authenticated", "editor"])
+async def slow_queries_clear(request: Request):
+    database: Database = request.state.database
+    if database.slow_queries:
+        database.slow_queries.clear()
+    return Response()
+
+
+@requires(["authenticated", "editor"])
+async def file_index_status(request: Request):
+    database: Database = request.state.database
+    return Response(
+        dumps(database.file_index.status() if database.file_index else None),
+        media_type="application/json",
+    )
+
+
+@requires(["authenticated", "editor"])
+async def file_index_scan(request: Request):
+    database: Database = request.state.database
+    jobs: JobQueue = request.state.jobs
+    if not database.file_index:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "The file index is disabled.")
+    elif jobs.active("scan_files"):
+        raise HTTPException(status.HTTP_409_CONFLICT, "The file index is already being scanned.")
+    return job_response(request, jobs.submit("scan_files"), status.HTTP_202_ACCEPTED)
+
+
+@requires(["authenticated", "editor"])
+async def sqlite_status(request: Request):
+    database: Database = request.state.database
+    return Response(
+        dumps(tuning_status(database.database.connection)),
+        media_type="application/json",
+    )
+
+
+@requires(["authenticated"])
+async def snapshot_status(request: Request):
+    snapshot: Snapshot | None = request.state.snapshot
+    return Response(
+        dumps(snapshot.status() if snapshot else None),
+        media_type="application/json",
+    )
+
+
+def export_job(job: Job) -> dict[str, Any]:
+    return job._asdict() | {"params": {k: v for k, v in job.params.items() if k != "ids"}}
+
+
+def job_response(request: Request, job: Job, status_code: int = status.HTTP_200_OK) -> Response:
+    return Response(
+        dumps(export_job(job)),
+        status_code,
+        {"Location": str(request.url_for("job", id=job.id))},
+        media_type="application/json",
+    )
+
+
+@requires(["authenticated", "editor"])
+async def jobs_list(request: Request):
+    jobs: JobQueue = request.state.jobs
+    return Response(
+        dumps([export_job(j) for j in sorted(jobs.jobs.values(), key=lambda j: j.id, reverse=True)]),
+        media_type="application/json",
+    )
+
+
+@requires(["authenticated", "editor"])
+async def jobs_submit(request: Request):
+    jobs: JobQueue = request.state.jobs
+    if (kind := request.path_params["kind"]) not in job_kinds_manual or kind not in jobs.handlers:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Unknown job {kind!r}.")
+    elif jobs.active(kind):
+        raise HTTPException(status.HTTP_409_CONFLICT, f"A {kind!r} job is already queued.")
+    job: Job = jobs.submit(
+        kind,
+        {k: v for k, v in request.query_params.items() if k != "priority"},
+        int(request.query_params.get("priority", job_priority_maintenance)),
+    )
+    return job_response(request, job, status.HTTP_202_ACCEPTED)
+
+
+@requires(["authenticated", "editor"])
+async def job(request: Request):
+    if not (j := request.state.jobs.jobs.get(request.path_params["id"])):
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    return job_response(request, j)
+
+
+@requires(["authenticated", "editor"])
+async def job_cancel(request: Request):
+    jobs: JobQueue = request.state.jobs
+    if not (j := jobs.jobs.get(request.path_params["id"])):
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    elif not jobs.cancel(j.id):
+        raise HTTPException(status.HTTP_409_CONFLICT, f"Job {j.id} is {j.status}.")
+    return job_response(request, jobs.jobs[j.id], status.HTTP_202_ACCEPTED)
+
+
+@requires(["authenticated", "editor"])
+async def profile(request: Request):
+    seconds: float = max(0.1, min(float(request.query_params.get("seconds", 10)), 60))
+    interval: float = max(0.001, min(float(request.query_params.get("interval", 0.005)), 1))
+    stacks = await get_running_loop().run_in_executor(None, profile_thread, get_ident(), seconds, interval)
+    if stacks is None:
+        raise HTTPException(status.HTTP_409_CONFLICT, "Profiler already running.")
+    return PlainTextResponse("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+
+
 @requires(["authenticated"])
 async def user(request: Request):
     database: Database = request.state.database
@@ -477,6 +965,7 @@ async def user_edit_save(request: Request):
 
     database.database.users[new_usr["USERNAME"]] = new_usr
     database.database.commit()
+    database.update_cached_rows(users_table, new_usr["USERNAME"])
 
     return Response()
 
@@ -486,8 +975,7 @@ async def user_edit_delete(request: Request):
     database: Database = request.state.database
     if not (usr := database.user(request.path_params["username"])):
         return Response(status_code=status.HTTP_404_NOT_FOUND)
-    del database.database.users[usr["USERNAME"]]
-    database.database.commit()
+    database.delete(users_table, usr["USERNAME"])
     return Response()
 
 
@@ -584,6 +1072,7 @@ async def submission(request: Request):
     fs, t = database.submission_files(sub["ID"])
     fst = database.submission_files_text(*fs) if fs else []
     fsm = database.submission_files_mime(*fs) if fs else []
+    fh = database.submission_file_html(fs[0]) if fst and fst[0] else ""
     cs = database.submission_comments(sub["ID"])
     p, n = database.submission_prev_next(sub["ID"], sub["AUTHOR"], sub["FOLDER"])
     sp, sn = None, None
@@ -606,6 +1095,7 @@ async def submission(request: Request):
             "submission": sub,
             "thumbnail": t,
             "files": list(zip(fs, fsm, fst)) if fs else [],
+            "file_html": fh,
             "comments": cs,
             "prev": p,
             "next": n,
@@ -636,16 +1126,23 @@ async def submission_edit(request: Request):
     return TemplateResponse(request, "pages/submission_edit.j2", {"submission": sub, "files": fs or [], "thumbnail": t})
 
 
+def log_upload(submission_id: int, path: Path, upload: UploadWriter):
+    logger.info(
+        f"Saved submission {submission_id} file {path.name} ({upload.size} bytes, sha256 {upload.hash.hexdigest()})"
+    )
+
+
 @requires(["authenticated", "editor"])
 async def submission_edit_save(request: Request):
     database: Database = request.state.database
+    database.resume_reorder(request.path_params["id"])
     if not (sub := database.database.submissions[request.path_params["id"]]):
         return Response(status_code=status.HTTP_404_NOT_FOUND)
 
     fs, t = database.submission_files(sub["ID"])
     new_sub = deepcopy(sub)
 
-    async with request.form() as form:
+    async with upload_form(request, folder := database.submission_folder(sub["ID"])) as form:
         new_sub["AUTHOR"] = form.get("author", "").strip() or new_sub["AUTHOR"]
         new_sub["TITLE"] = form.get("title", "").strip()
         new_sub["DATE"] = datetime.fromisoformat(form.get("date")) if form.get("date") else new_sub["DATE"]
@@ -677,16 +1174,10 @@ async def submission_edit_save(request: Request):
 
         if any(i != j for i, j in form_files.items()):
             files = {f: form_files.get(i, i) for i, f in enumerate(fs or [])}
-            for file, new_index in files.items():
-                if new_index is None:
-                    continue
-                copy2(file, file.with_stem(f".submission{new_index or ''}"))
-            for file in files.keys():
-                file.unlink(missing_ok=True)
-            for file, new_index in files.items():
-                if new_index is None:
-                    continue
-                file.with_stem(f".submission{new_index or ''}").replace(file.with_stem(f"submission{new_index or ''}"))
+            reorder_files(
+                folder,
+                {f: None if i is None else f.with_stem(f"submission{i or ''}") for f, i in files.items()},
+            )
 
             files = {f: i for f, i in files.items() if i is not None}
             new_sub["FILEEXT"] = [f.suffix.strip(".") for f, i in sorted(files.items(), key=lambda fi: fi[1])]
@@ -695,26 +1186,23 @@ async def submission_edit_save(request: Request):
             t.unlink(missing_ok=True)
             new_sub["FILESAVED"] &= ~0b1
         if (t_new := form.get("new_thumbnail")) and t_new.size:
-            if t:
+            if t and t != folder / "thumbnail.jpg":
                 t.unlink(missing_ok=True)
-            database.database.submissions.save_submission_thumbnail(new_sub["ID"], await t_new.read())
+            log_upload(new_sub["ID"], t_new.file.commit(folder / "thumbnail.jpg"), t_new.file)
             new_sub["FILESAVED"] |= 0b1
 
         for f_new in form.getlist("new_file"):
             if not f_new.size:
                 continue
-            new_sub["FILEEXT"].append(
-                database.database.submissions.save_submission_file(
-                    new_sub["ID"],
-                    await f_new.read(),
-                    "submission",
-                    Path(f_new.filename).suffix.strip("."),
-                    len(new_sub["FILEEXT"]),
-                )
-            )
+            ext: str = f_new.file.extension(Path(f_new.filename or "").suffix.strip("."))
+            name: str = f"submission{len(new_sub['FILEEXT']) or ''}" + (f".{ext}" if ext else "")
+            log_upload(new_sub["ID"], f_new.file.commit(folder / name), f_new.file)
+            new_sub["FILEEXT"].append(ext)
 
     database.database.submissions[new_sub["ID"]] = new_sub
     database.database.commit()
+    database.refresh_files(new_sub["ID"])
+    database.update_cached_rows(submissions_table, new_sub["ID"])
 
     return Response()
 
@@ -725,12 +1213,8 @@ async def submission_edit_delete(request: Request):
     if not (sub := database.submission(request.path_params["id"])):
         return Response(status_code=status.HTTP_404_NOT_FOUND)
     fs, t = database.submission_files(sub["ID"])
-    for f in fs or []:
-        f.unlink(missing_ok=True)
-    if t:
-        t.unlink(missing_ok=True)
-    del database.database.submissions[sub["ID"]]
-    database.database.commit()
+    database.delete(submissions_table, sub["ID"])
+    request.state.reaper.remove([*(fs or []), *([t] if t else [])])
     return Response()
 
 
@@ -739,17 +1223,22 @@ async def submission_thumbnail(request: Request):
     database: Database = request.state.database
     fs, t = database.submission_files(request.path_params["id"])
     x, y = request.path_params.get("x"), request.path_params.get("y")
-    if t is not None and t.is_file():
+    if t is not None and (t_stat := database.file_stat(t)):
         if not x and not y:
-            return FileResponse(str(t))
-        with Image.open(t) as img:
+            metrics.observe_thumbnail("stored")
+            return IndexedFileResponse(
+                str(t), partial(database.refresh_files, request.path_params["id"]), stat_result=t_stat
+            )
+        metrics.observe_thumbnail("resized")
+        with timer("thumbnail"), Image.open(t) as img:
             img.thumbnail((x or y, y or x))
             img.save(f_obj := BytesIO(), img.format, quality=95)
             f_obj.seek(0)
             return StreamingResponse(f_obj, 201, media_type=f"image/{img.format}".lower())
-    elif fs and fs[0].is_file():
+    elif fs and database.file_entry(fs[0]):
+        metrics.observe_thumbnail("generated")
         try:
-            with Image.open(fs[0]) as img:
+            with timer("thumbnail"), Image.open(fs[0]) as img:
                 img.thumbnail((x or y or 400, y or x or 400))
                 img.save(f_obj := BytesIO(), img.format, quality=95)
                 f_obj.seek(0)
@@ -768,13 +1257,27 @@ async def submission_file(request: Request):
     content_type: str | None = None
     if not fs or n > len(fs) - 1:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "")
-    elif not fs[n].is_file():
+    elif not (stat := database.file_stat(fs[n])):
         raise HTTPException(status.HTTP_404_NOT_FOUND, "")
     if fs[n].suffix == ".txt" and database.submission_files_mime(fs[n])[0] in ("text/plain", None):
-        with fs[n].open("rb") as fh:
-            if encoding := detect_encoding(fh.read(1024))["encoding"]:
-                content_type = f"text/plain; charset={encoding}"
-    return FileResponse(str(fs[n]), content_type=content_type)
+        if encoding := database.file_charset(fs[n]):
+            content_type = f"text/plain; charset={encoding}"
+    return IndexedFileResponse(
+        str(fs[n]),
+        partial(database.refresh_files, request.path_params["id"]),
+        content_type=content_type,
+        stat_result=stat,
+    )
+
+
+@requires(["authenticated"])
+async def submission_file_text(request: Request):
+    database: Database = request.state.database
+    n = request.path_params["n"]
+    fs, _ = database.submission_files(request.path_params["id"])
+    if not fs or n > len(fs) - 1 or fs[n].suffix != ".txt" or not database.file_entry(fs[n]):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "")
+    return HTMLResponse(database.submission_file_html(fs[n]).strip())
 
 
 @requires(["authenticated"])
@@ -786,10 +1289,10 @@ async def submission_zip(request: Request):
     fs, t = database.submission_files(request.path_params["id"])
 
     with ZipFile(f_obj := BytesIO(), "w") as z:
-        for f in fs:
-            if f.is_file():
+        for f in fs or []:
+            if database.file_entry(f):
                 z.writestr(f.name, f.read_bytes())
-        if t and t.is_file():
+        if t and database.file_entry(t):
             z.writestr(t.name, t.read_bytes())
         if request.query_params.get("files-only") is None:
             z.writestr("description.txt" if database.bbcode() else "description.html", sub["DESCRIPTION"].encode())
@@ -885,6 +1388,7 @@ async def journal_edit_save(request: Request):
 
     database.database.journals[new_jrn["ID"]] = new_jrn
     database.database.commit()
+    database.update_cached_rows(journals_table, new_jrn["ID"])
 
     return Response()
 
@@ -894,8 +1398,7 @@ async def journal_edit_delete(request: Request):
     database: Database = request.state.database
     if not (jrn := database.journal(request.path_params["id"])):
         return Response(status_code=status.HTTP_404_NOT_FOUND)
-    del database.database.journals[jrn["ID"]]
-    database.database.commit()
+    database.delete(journals_table, jrn["ID"])
     return Response()
 
 
@@ -970,19 +1473,23 @@ async def general_error(request: Request, exc: Exception):
     )
 
 
-def server(
-    database_path: str | PathLike,
-    host: str = "0.0.0.0",
-    port: int = None,
-    ssl_cert: Path | None = None,
-    ssl_key: Path | None = None,
+def make_app(
+    database_path: Path,
+    address: str,
+    ssl: bool = False,
     authentication: tuple[tuple[str, str], ...] | None = None,
     authentication_ignore: tuple[str, ...] | None = None,
     editors: tuple[str, ...] | None = None,
     max_results: int | None = None,
     use_cache: bool = True,
-    browser: bool = True,
-):
+    browser: bool = False,
+    timing: bool = False,
+    slow_query_time: float | None = None,
+    file_index: bool = False,
+    snapshot_interval: int | None = None,
+    sqlite_tuning: SQLiteTuning | None = None,
+    stats_counters: bool = False,
+) -> Starlette:
     register_url_convertor("table", TableConvertor())
 
     routes: list[BaseRoute] = [
@@ -1022,6 +1529,7 @@ def server(
         Route("/submission/{id:int}/edit", submission_edit_delete, methods=["DELETE"]),
         Route("/submission/{id:int}/file", submission_file),
         Route("/submission/{id:int}/file/{n:int}", submission_file),
+        Route("/submission/{id:int}/file/{n:int}/text", submission_file_text),
         Route("/submission/{id:int}/file/{n:int}/{filename}", submission_file),
         Route("/submission/{id:int}/thumbnail", submission_thumbnail),
         Route("/submission/{id:int}/thumbnail/{x:int}x", submission_thumbnail),
@@ -1049,10 +1557,30 @@ def server(
             lambda r: RedirectResponse(r.url_for("search", **r.path_params).include_query_params(**r.query_params)),
         ),
         Route("/{table:table}", search),
+        Route("/suggest/{kind}", suggest),
+        Route("/api/{table:table}", api_search),
+        Route("/api/{table:table}/bulk", api_bulk_edit, methods=["POST"]),
+        Route("/debug/profile", profile),
+        Route("/debug/queries", slow_queries),
+        Route("/debug/queries", slow_queries_clear, methods=["DELETE"]),
+        Route("/debug/files", file_index_status),
+        Route("/debug/files", file_index_scan, methods=["POST"]),
+        Route("/debug/snapshot", snapshot_status),
+        Route("/debug/sqlite", sqlite_status),
+        Route("/jobs", jobs_list),
+        Route("/jobs/{id:int}", job),
+        Route("/jobs/{id:int}", job_cancel, methods=["DELETE"]),
+        Route("/jobs/{kind}", jobs_submit, methods=["POST"]),
+        Route("/metrics", metrics_endpoint),
         Route("/logout", logout),
         Mount("/static", app=StaticFiles(directory=Path(__file__).parent / "static")),
     ]
     middleware: list[Middleware] = []
+    auth_backend: AuthenticationBackend = (
+        BasicAuthBackend(authentication, authentication_ignore, editors) if authentication else NoAuthBackend()
+    )
+    if snapshot_interval:
+        auth_backend = ReadOnlyAuthBackend(auth_backend)
     # noinspection PyTypeChecker
     exception_handlers: dict[Any, ExceptionHandler] = {
         HTTPException: http_error,
@@ -1064,25 +1592,73 @@ def server(
         middleware.extend(
             [
                 Middleware(
-                    SessionMiddleware,
+                    SessionCookieMiddleware,
                     session_cookie=__package__,
-                    secret_key=sha256("\0".join(":".join(a) for a in authentication).encode()).hexdigest(),
+                    secret_key=auth_secret(authentication),
+                    https_only=ssl,
                 ),
                 Middleware(
                     AuthenticationMiddleware,
-                    backend=BasicAuthBackend(authentication, authentication_ignore, editors),
+                    backend=auth_backend,
                     on_error=BasicAuthBackend.on_auth_error,
                 ),
             ]
         )
     else:
         # noinspection PyTypeChecker
-        middleware.append(Middleware(AuthenticationMiddleware, backend=NoAuthBackend()))
+        middleware.append(Middleware(AuthenticationMiddleware, backend=auth_backend))
 
     if use_cache:
         # noinspection PyTypeChecker
         middleware.append(Middleware(CacheMiddleware))
 
+    if timing:
+        # noinspection PyTypeChecker
+        middleware.insert(0, Middleware(TimingMiddleware))
+
+    # noinspection PyTypeChecker
+    middleware.insert(0, Middleware(MetricsMiddleware, routes=routes))
+
+    return Starlette(
+        routes=routes,
+        middleware=middleware,
+        exception_handlers=exception_handlers,
+        lifespan=make_lifespan(
+            database_path,
+            use_cache,
+            max_results,
+            address,
+            ssl,
+            bool(authentication),
+            browser,
+            slow_query_time,
+            file_index,
+            snapshot_interval,
+            sqlite_tuning,
+            stats_counters,
+        ),
+    )
+
+
+def server(
+    database_path: str | PathLike,
+    host: str = "0.0.0.0",
+    port: int = None,
+    ssl_cert: Path | None = None,
+    ssl_key: Path | None = None,
+    authentication: tuple[tuple[str, str], ...] | None = None,
+    authentication_ignore: tuple[str, ...] | None = None,
+    editors: tuple[str, ...] | None = None,
+    max_results: int | None = None,
+    use_cache: bool = True,
+    browser: bool = True,
+    timing: bool = False,
+    slow_query_time: float | None = None,
+    file_index: bool = False,
+    snapshot_interval: int | None = None,
+    sqlite_tuning: SQLiteTuning | None = None,
+    stats_counters: bool = False,
+):
     if ssl_cert and ssl_key:
         if not ssl_cert or not ssl_cert.is_file():
             raise FileNotFoundError(f"SSL certificate {ssl_cert}")
@@ -1098,19 +1674,22 @@ def server(
     )
 
     run(
-        Starlette(
-            routes=routes,
-            middleware=middleware,
-            exception_handlers=exception_handlers,
-            lifespan=make_lifespan(
-                database_path,
-                use_cache,
-                max_results,
-                address,
-                bool(ssl_cert and ssl_key),
-                bool(authentication),
-                browser,
-            ),
+        make_app(
+            database_path,
+            address,
+            bool(ssl_cert and ssl_key),
+            authentication,
+            authentication_ignore,
+            editors,
+            max_results,
+            use_cache,
+            browser,
+            timing,
+            slow_query_time,
+            file_index,
+            snapshot_interval,
+            sqlite_tuning,
+            stats_counters,
         ),
         host=host,
         port=port,
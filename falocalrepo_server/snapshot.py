@@ -0,0 +1,120 @@
+from datetime import datetime
+from logging import Logger
+from logging import getLogger
+from pathlib import Path
+from sqlite3 import Connection
+from sqlite3 import DatabaseError
+from sqlite3 import connect
+from threading import Event
+from threading import Lock
+from threading import Thread
+from time import perf_counter
+
+snapshot_interval: int = 60
+snapshot_backup_pages: int = 1024
+snapshot_backup_sleep: float = 0.005
+
+logger: Logger = getLogger("uvicorn")
+
+
+def file_version(path: Path) -> tuple[int, int]:
+    try:
+        return (s := path.stat()).st_mtime_ns, s.st_size
+    except FileNotFoundError:
+        return 0, 0
+
+
+def source_version(path: Path) -> tuple[int, ...]:
+    return *file_version(path), *file_version(path.with_name(path.name + "-wal"))
+
+
+class Snapshot:
+    def __init__(self, source: Path, interval: float = snapshot_interval):
+        self.source: Path = source
+        self.interval: float = interval
+        self.generation: int = 0
+        self.used: int = 0
+        self.version: tuple[int, ...] = ()
+        self.refreshed: datetime | None = None
+        self.duration: float = 0
+        self.error: str | None = None
+        self.lock: Lock = Lock()
+        self.stopping: Event = Event()
+        self.thread: Thread | None = None
+
+    def snapshot_path(self, generation: int) -> Path:
+        return self.source.with_name(f"{self.source.stem}.snapshot{generation}{self.source.suffix}")
+
+    @property
+    def path(self) -> Path:
+        return self.snapshot_path(self.generation)
+
+    def remove_old(self):
+        with self.lock:
+            self._remove_old()
+
+    def _remove_old(self):
+        for path in self.source.parent.glob(f"{self.source.stem}.snapshot*{self.source.suffix}"):
+            if path not in (self.path, self.snapshot_path(self.used)):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def refresh(self) -> bool:
+        if (version := source_version(self.source)) == self.version:
+            return False
+        time_start: float = perf_counter()
+        path: Path = self.snapshot_path(self.generation + 1)
+        path.unlink(missing_ok=True)
+        source: Connection = connect(f"{self.source.as_uri()}?mode=ro", uri=True, timeout=60)
+        target: Connection = connect(path)
+        try:
+            source.backup(target, pages=snapshot_backup_pages, sleep=snapshot_backup_sleep)
+        finally:
+            target.close()
+            source.close()
+        with self.lock:
+            self.generation += 1
+            self.version = version
+            self.refreshed = datetime.now()
+            self.duration = perf_counter() - time_start
+            self._remove_old()
+        return True
+
+    def start(self):
+        self.remove_old()
+        self.refresh()
+        self.stopping.clear()
+        self.thread = Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 10):
+        self.stopping.set()
+        if self.thread:
+            self.thread.join(timeout)
+        self.thread = None
+        with self.lock:
+            self.used = self.generation = -1
+            self._remove_old()
+
+    def work(self):
+        while not self.stopping.wait(self.interval):
+            try:
+                if self.refresh():
+                    logger.info(f"Refreshed snapshot {self.generation} in {self.duration:.3f}s")
+                self.error = None
+            except (DatabaseError, OSError) as err:
+                self.error = repr(err)
+                logger.warning(f"Snapshot refresh failed: {err!r}")
+
+    def status(self) -> dict[str, str | int | float | None]:
+        return {
+            "source": str(self.source),
+            "path": str(self.path),
+            "generation": self.generation,
+            "refreshed": self.refreshed.isoformat() if self.refreshed else None,
+            "duration": self.duration,
+            "interval": self.interval,
+            "error": self.error,
+        }
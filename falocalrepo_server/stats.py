@@ -0,0 +1,89 @@
+from os import PathLike
+from pathlib import Path
+from sqlite3 import Connection
+from sqlite3 import DatabaseError
+from sqlite3 import connect
+
+from falocalrepo_database import Database as FADatabase
+from falocalrepo_database import Table
+
+stats_table: str = "SERVER_STATS"
+
+
+def stats_tables(database: FADatabase) -> list[Table]:
+    return [database.users, database.submissions, database.journals, database.comments]
+
+
+def stats_triggers(table: Table) -> dict[str, str]:
+    key_match: str = " and ".join(f"{k.name} = new.{k.name}" for k in table.keys)
+    return {
+        f"{stats_table}_{table.name}_INSERT": f"""
+        create trigger if not exists {stats_table}_{table.name}_INSERT
+        before insert on {table.name}
+        when not exists (select 1 from {table.name} where {key_match})
+        begin
+            update {stats_table} set ROWS = ROWS + 1 where TABLE_NAME = '{table.name}';
+        end
+        """,
+        f"{stats_table}_{table.name}_DELETE": f"""
+        create trigger if not exists {stats_table}_{table.name}_DELETE
+        after delete on {table.name}
+        begin
+            update {stats_table} set ROWS = ROWS - 1 where TABLE_NAME = '{table.name}';
+        end
+        """,
+    }
+
+
+def install_stats(connection: Connection, tables: list[Table]) -> bool:
+    triggers: dict[str, str] = {n: sql for t in tables for n, sql in stats_triggers(t).items()}
+    existing: set[str] = {
+        name for [name] in connection.execute("select name from sqlite_master where type = 'trigger'").fetchall()
+    }
+
+    if triggers.keys() <= existing:
+        return False
+
+    connection.execute("begin immediate")
+    try:
+        connection.execute(
+            f"create table if not exists {stats_table} (TABLE_NAME text primary key, ROWS integer not null)"
+        )
+        for table in tables:
+            connection.execute(
+                f"insert or replace into {stats_table} (TABLE_NAME, ROWS) select ?, count(*) from {table.name}",
+                [table.name],
+            )
+        for sql in triggers.values():
+            connection.execute(sql)
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+
+    return True
+
+
+def read_stats(database: FADatabase) -> dict[str, int] | None:
+    try:
+        return dict(database.execute(f"select TABLE_NAME, ROWS from {stats_table}").fetchall()) or None
+    except DatabaseError:
+        return None
+
+
+def recount_stats(database_path: str | PathLike) -> dict[str, int]:
+    conn: Connection = connect(Path(database_path), timeout=60)
+    try:
+        conn.execute("begin")
+        current: dict[str, int] = dict(conn.execute(f"select TABLE_NAME, ROWS from {stats_table}").fetchall())
+        counts: dict[str, int] = {t: conn.execute(f"select count(*) from {t}").fetchone()[0] for t in current}
+        conn.rollback()
+        if counts != current:
+            with conn:
+                conn.executemany(
+                    f"update {stats_table} set ROWS = ROWS + ? where TABLE_NAME = ?",
+                    [(rows - current[table], table) for table, rows in counts.items()],
+                )
+        return counts
+    finally:
+        conn.close()
@@ -0,0 +1,154 @@
+from bisect import bisect_left
+from bisect import bisect_right
+from collections import Counter
+from heapq import nlargest
+from os import PathLike
+from pathlib import Path
+from sqlite3 import Connection
+from sqlite3 import connect
+from typing import Iterable
+
+from falocalrepo_database.tables import SubmissionsColumns
+from falocalrepo_database.tables import UsersColumns
+from falocalrepo_database.tables import submissions_table
+from falocalrepo_database.tables import users_table
+from falocalrepo_database.util import clean_username
+
+from falocalrepo_server.tuning import SQLiteTuning
+from falocalrepo_server.tuning import apply_tuning
+
+suggestions_kinds: tuple[str, ...] = ("authors", "tags", "species", "folders")
+suggestions_chunk_size: int = 500
+
+
+class SuggestionList:
+    def __init__(self, counts: dict[str, int], refs: dict[str, int]):
+        items: list[tuple[str, str]] = sorted((k.lower(), k) for k, n in refs.items() if k and n > 0)
+        self.keys: list[str] = [k for k, _ in items]
+        self.names: list[str] = [v for _, v in items]
+        self.counts: list[int] = [counts.get(v, 0) for v in self.names]
+        self.refs: list[int] = [refs[v] for v in self.names]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def position(self, name: str) -> tuple[int, bool]:
+        key: str = name.lower()
+        start: int = bisect_left(self.keys, key)
+        index: int = bisect_left(self.names, name, start, bisect_right(self.keys, key, start))
+        return index, index < len(self.names) and self.names[index] == name
+
+    def update(self, name: str, count: int, refs: int):
+        if not name:
+            return
+        index, found = self.position(name)
+        if not found:
+            if refs <= 0:
+                return
+            self.keys.insert(index, name.lower())
+            self.names.insert(index, name)
+            self.counts.insert(index, count)
+            self.refs.insert(index, refs)
+        elif (self.refs[index] + refs) > 0:
+            self.counts[index] += count
+            self.refs[index] += refs
+        else:
+            del self.keys[index], self.names[index], self.counts[index], self.refs[index]
+
+    def search(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        prefix = prefix.lower()
+        start: int = bisect_left(self.keys, prefix)
+        end: int = bisect_right(self.keys, prefix + "\U0010ffff", start)
+        return [
+            (self.names[i], self.counts[i]) for i in nlargest(limit, range(start, end), key=self.counts.__getitem__)
+        ]
+
+
+class SuggestionIndex:
+    def __init__(
+        self,
+        version: tuple[int, int],
+        users: Iterable[tuple[str, str]],
+        submissions: Iterable[tuple[int, str, str, str]],
+    ):
+        self.version: tuple[int, int] = version
+        self.strings: dict[str, str] = {}
+        self.users: dict[str, tuple[str, ...]] = {}
+        self.submissions: dict[int, tuple[str, tuple[str, ...], str]] = {}
+        counts: dict[str, Counter[str]] = {k: Counter() for k in suggestions_kinds}
+        refs: dict[str, Counter[str]] = {k: Counter() for k in suggestions_kinds}
+
+        for username, user_folders in users:
+            self.users[username] = entry = self.user_entry(user_folders)
+            refs["authors"][username] += 1
+            counts["folders"].update(entry)
+            refs["folders"].update(entry)
+
+        for submission_id, *row in submissions:
+            self.submissions[submission_id] = (author, tags, species) = self.submission_entry(*row)
+            for kind, values in (("authors", (author,)), ("tags", tags), ("species", (species,))):
+                counts[kind].update(values)
+                refs[kind].update(values)
+
+        self.lists: dict[str, SuggestionList] = {k: SuggestionList(counts[k], refs[k]) for k in suggestions_kinds}
+
+    def intern(self, value: str) -> str:
+        return self.strings.setdefault(value, value)
+
+    def user_entry(self, folders: str) -> tuple[str, ...]:
+        return tuple(self.intern(f) for f in folders.strip("|").split("||") if f)
+
+    def submission_entry(self, author: str, tags: str, species: str) -> tuple[str, tuple[str, ...], str]:
+        return (
+            self.intern(clean_username(author)),
+            tuple(self.intern(t) for t in tags.strip("|").split("||") if t),
+            self.intern(species),
+        )
+
+    def update_user(self, username: str, row: tuple[str] | None):
+        if (old := self.users.pop(username, None)) is not None:
+            self.lists["authors"].update(username, 0, -1)
+            for folder in old:
+                self.lists["folders"].update(folder, -1, -1)
+        if row is not None:
+            self.users[username] = entry = self.user_entry(*row)
+            self.lists["authors"].update(username, 0, 1)
+            for folder in entry:
+                self.lists["folders"].update(folder, 1, 1)
+
+    def update_submission(self, submission_id: int, row: tuple[str, str, str] | None):
+        for entry, delta in (
+            (self.submissions.pop(submission_id, None), -1),
+            (self.submission_entry(*row) if row is not None else None, 1),
+        ):
+            if entry is None:
+                continue
+            elif delta > 0:
+                self.submissions[submission_id] = entry
+            author, tags, species = entry
+            self.lists["authors"].update(author, delta, delta)
+            self.lists["species"].update(species, delta, delta)
+            for tag in tags:
+                self.lists["tags"].update(tag, delta, delta)
+
+    def search(self, kind: str, prefix: str, limit: int = 10) -> list[tuple[str, int]]:
+        return self.lists[kind].search(prefix, limit) if kind in self.lists else []
+
+
+def build_suggestion_index(
+    database_path: str | PathLike,
+    version: tuple[int, int],
+    tuning: SQLiteTuning | None = None,
+) -> SuggestionIndex:
+    conn: Connection = apply_tuning(connect(Path(database_path).as_uri() + "?mode=ro", uri=True), tuning, True)
+    try:
+        return SuggestionIndex(
+            version,
+            conn.execute(f"select {UsersColumns.USERNAME.name}, {UsersColumns.FOLDERS.name} from {users_table}"),
+            conn.execute(
+                f"select {SubmissionsColumns.ID.name}, {SubmissionsColumns.AUTHOR.name}, "
+                f"{SubmissionsColumns.TAGS.name}, {SubmissionsColumns.SPECIES.name} from {submissions_table}"
+            ),
+        )
+    finally:
+        conn.close()
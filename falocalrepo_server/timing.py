@@ -0,0 +1,95 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from os.path import basename
+from sys import _current_frames
+from threading import Lock
+from time import perf_counter
+from time import sleep
+from types import FrameType
+from typing import Callable
+from typing import Iterator
+from typing import ParamSpec
+from typing import TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+Timings = dict[tuple[str, str | None], list[int | float]]
+
+request_timings: ContextVar[Timings | None] = ContextVar("request_timings", default=None)
+profiler_lock: Lock = Lock()
+
+
+def start_timings() -> Timings:
+    timings: Timings = {}
+    request_timings.set(timings)
+    return timings
+
+
+@contextmanager
+def timer(name: str, description: str | None = None) -> Iterator[None]:
+    if (timings := request_timings.get()) is None:
+        yield
+        return
+    time_start: float = perf_counter()
+    try:
+        yield
+    finally:
+        entry: list[int | float] = timings.setdefault((name, description), [0, 0.0])
+        entry[0] += 1
+        entry[1] += perf_counter() - time_start
+
+
+def timed(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with timer(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def server_timing(timings: Timings, total: float) -> str:
+    return ", ".join(
+        [
+            *(
+                f"{name}" + (f';desc="{description}"' if description else "") + f";dur={duration * 1000:.2f}"
+                for (name, description), (_, duration) in timings.items()
+            ),
+            f"total;dur={total * 1000:.2f}",
+        ]
+    )
+
+
+def timings_dict(timings: Timings) -> dict[str, dict[str, int | float]]:
+    return {
+        f"{name}:{description}" if description else name: {"count": count, "duration": round(duration * 1000, 3)}
+        for (name, description), (count, duration) in timings.items()
+    }
+
+
+def frame_stack(frame: FrameType | None) -> str:
+    stack: list[str] = []
+    while frame:
+        stack.append(f"{frame.f_code.co_name} ({basename(frame.f_code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+def profile_thread(thread_id: int, seconds: float, interval: float = 0.005) -> Counter[str] | None:
+    if not profiler_lock.acquire(blocking=False):
+        return None
+    try:
+        stacks: Counter[str] = Counter()
+        time_end: float = perf_counter() + seconds
+        while perf_counter() < time_end:
+            if stack := frame_stack(_current_frames().get(thread_id)):
+                stacks[stack] += 1
+            sleep(interval)
+        return stacks
+    finally:
+        profiler_lock.release()
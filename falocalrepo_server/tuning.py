@@ -0,0 +1,39 @@
+from collections import namedtuple
+from sqlite3 import Connection
+
+SQLiteTuning = namedtuple(
+    "SQLiteTuning",
+    ["mmap_mb", "cache_mb", "temp_store_memory", "wal", "optimize_interval"],
+    defaults=[0, 0, False, False, 0],
+)
+
+sqlite_analysis_limit: int = 1000
+
+
+def apply_tuning(connection: Connection, tuning: SQLiteTuning | None, query_only: bool = False) -> Connection:
+    if tuning is None:
+        return connection
+    if tuning.mmap_mb:
+        connection.execute(f"pragma mmap_size = {int(tuning.mmap_mb) * 2**20}")
+    if tuning.cache_mb:
+        connection.execute(f"pragma cache_size = {-int(tuning.cache_mb) * 1024}")
+    if tuning.temp_store_memory:
+        connection.execute("pragma temp_store = memory")
+    if tuning.wal and not query_only:
+        connection.execute("pragma journal_mode = wal")
+    if query_only:
+        connection.execute("pragma query_only = 1")
+    return connection
+
+
+def tuning_status(connection: Connection) -> dict[str, int | str]:
+    return {
+        pragma: connection.execute(f"pragma {pragma}").fetchone()[0]
+        for pragma in ("mmap_size", "cache_size", "temp_store", "journal_mode", "query_only")
+    }
+
+
+def optimize(connection: Connection):
+    connection.execute(f"pragma analysis_limit = {sqlite_analysis_limit}")
+    connection.execute("pragma optimize")
+    connection.commit()
@@ -0,0 +1,196 @@
+from contextlib import asynccontextmanager
+from hashlib import sha256
+from os import chmod
+from os import fdopen
+from os import umask
+from pathlib import Path
+from tempfile import mkstemp
+from typing import AsyncIterator
+from typing import BinaryIO
+
+from falocalrepo_database.util import guess_extension
+from python_multipart import MultipartParser
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import FormData
+from starlette.datastructures import Headers
+from starlette.datastructures import UploadFile
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+
+upload_header_size: int = 8192
+upload_max_files: int = 1000
+upload_max_fields: int = 1000
+upload_max_field_size: int = 1024 * 1024
+
+
+def default_file_mode() -> int:
+    umask(mask := umask(0o022))
+    return 0o666 & ~mask
+
+
+upload_file_mode: int = default_file_mode()
+
+
+class UploadWriter:
+    def __init__(self, folder: Path):
+        self.folder: Path = folder
+        self.path: Path | None = None
+        self.file: BinaryIO | None = None
+        self.hash = sha256()
+        self.header: bytes = b""
+        self.size: int = 0
+        self.committed: bool = False
+
+    def open(self) -> BinaryIO:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        fd, name = mkstemp(prefix=".upload-", dir=self.folder)
+        self.path = Path(name)
+        self.file = fdopen(fd, "w+b")
+        return self.file
+
+    def write(self, data: bytes) -> int:
+        self.hash.update(data)
+        if len(self.header) < upload_header_size:
+            self.header += data[: upload_header_size - len(self.header)]
+        self.size += len(data)
+        return (self.file or self.open()).write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self.file.read(size) if self.file else b""
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self.file.seek(offset, whence) if self.file else 0
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+    def extension(self, default: str = "") -> str:
+        return guess_extension(self.header, default)
+
+    def commit(self, path: Path) -> Path:
+        self.close()
+        chmod(self.path, upload_file_mode)
+        self.path.replace(path)
+        self.committed = True
+        return path
+
+    def discard(self):
+        self.close()
+        if self.path and not self.committed:
+            self.path.unlink(missing_ok=True)
+
+
+class UploadParser:
+    def __init__(self, request: Request, folder: Path):
+        self.request: Request = request
+        self.folder: Path = folder
+        self.writers: list[UploadWriter] = []
+        self.items: list[tuple[str, str | UploadFile]] = []
+        self.pending: list[tuple[UploadWriter, bytes]] = []
+        self.charset: str = "utf-8"
+        self.header_field: bytes = b""
+        self.header_value: bytes = b""
+        self.headers: list[tuple[bytes, bytes]] = []
+        self.name: str = ""
+        self.data: bytearray = bytearray()
+        self.upload: UploadFile | None = None
+        self.files: int = 0
+        self.fields: int = 0
+
+    def decode(self, value: bytes) -> str:
+        try:
+            return value.decode(self.charset)
+        except (UnicodeDecodeError, LookupError):
+            return value.decode("latin-1")
+
+    def on_part_begin(self):
+        self.headers, self.data, self.upload = [], bytearray(), None
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers.append((self.header_field.lower(), self.header_value))
+        self.header_field, self.header_value = b"", b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(dict(self.headers).get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise HTTPException(400, 'The Content-Disposition header field "name" must be provided.')
+        self.name = self.decode(options[b"name"])
+        if b"filename" in options:
+            if (files := self.files + 1) > upload_max_files:
+                raise HTTPException(400, f"Too many files. Maximum number of files is {upload_max_files}.")
+            self.files = files
+            self.writers.append(writer := UploadWriter(self.folder))
+            self.upload = UploadFile(
+                writer, size=0, filename=self.decode(options[b"filename"]), headers=Headers(raw=self.headers)
+            )
+        elif (fields := self.fields + 1) > upload_max_fields:
+            raise HTTPException(400, f"Too many fields. Maximum number of fields is {upload_max_fields}.")
+        else:
+            self.fields = fields
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self.upload is not None:
+            self.pending.append((self.upload.file, data[start:end]))
+        elif len(self.data) + end - start > upload_max_field_size:
+            raise HTTPException(400, f"Part exceeded maximum size of {upload_max_field_size // 1024}KB.")
+        else:
+            self.data.extend(data[start:end])
+
+    def on_part_end(self):
+        self.items.append((self.name, self.upload if self.upload is not None else self.decode(self.data)))
+
+    async def parse(self) -> FormData:
+        _, params = parse_options_header(self.request.headers.get("Content-Type", ""))
+        if isinstance(charset := params.get(b"charset", b"utf-8"), bytes):
+            self.charset = charset.decode("latin-1")
+        if not (boundary := params.get(b"boundary")):
+            raise HTTPException(400, "Missing boundary in multipart.")
+        parser: MultipartParser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self.on_part_begin,
+                "on_part_data": self.on_part_data,
+                "on_part_end": self.on_part_end,
+                "on_header_field": self.on_header_field,
+                "on_header_value": self.on_header_value,
+                "on_header_end": self.on_header_end,
+                "on_headers_finished": self.on_headers_finished,
+            },
+        )
+        try:
+            async for chunk in self.request.stream():
+                parser.write(chunk)
+                for writer, data in self.pending:
+                    await run_in_threadpool(writer.write, data)
+                self.pending.clear()
+            parser.finalize()
+        except MultipartParseError as err:
+            raise HTTPException(400, str(err))
+        for _, item in self.items:
+            if isinstance(item, UploadFile):
+                item.size = item.file.size
+                item.file.seek(0)
+        return FormData(self.items)
+
+
+@asynccontextmanager
+async def upload_form(request: Request, folder: Path) -> AsyncIterator[FormData]:
+    if parse_options_header(request.headers.get("Content-Type", ""))[0] != b"multipart/form-data":
+        async with request.form() as form:
+            yield form
+        return
+    parser: UploadParser = UploadParser(request, folder)
+    try:
+        yield await parser.parse()
+    finally:
+        for writer in parser.writers:
+            writer.discard()
@@ -0,0 +1,75 @@
+from functools import lru_cache
+from re import compile as re_compile
+from re import IGNORECASE
+from re import Pattern
+
+mobile_user_agent_regex_a: str = (
+    r"(android|bb\d+|meego).+mobile|avantgo|bada\/|blackberry|blazer|compal|elaine|fennec|hiptop|iemobile|"
+    r"ip(hone|od)|iris|kindle|lge |maemo|midp|mmp|mobile.+firefox|netfront|opera m(ob|in)i|palm( os)?|phone|p(ixi|re)"
+    r"\/|plucker|pocket|psp|series([46])0|symbian|treo|up\.(browser|link)|vodafone|wap|windows ce|xda|xiino"
+)
+mobile_user_agent_regex_b: str = (
+    r"1207|6310|6590|3gso|4thp|50[1-6]i|770s|802s|a wa|abac|ac(er|oo|s\-)|ai(ko|rn)|al(av|ca|co)|amoi|an(ex|ny|yw)"
+    r"|aptu|ar(ch|go)|as(te|us)|attw|au(di|\-m|r |s )|avan|be(ck|ll|nq)|bi(lb|rd)|bl(ac|az)|br([ev])w|bumb|bw\-([nu])"
+    r"|c55\/|capi|ccwa|cdm\-|cell|chtm|cldc|cmd\-|co(mp|nd)|craw|da(it|ll|ng)|dbte|dc\-s|devi|dica|dmob|do([cp])o|"
+    r"ds(12|\-d)|el(49|ai)|em(l2|ul)|er(ic|k0)|esl8|ez([4-7]0|os|wa|ze)|fetc|fly(\-|_)|g1 u|g560|gene|gf\-5|g\-mo"
+    r"|go(\.w|od)|gr(ad|un)|haie|hcit|hd\-([mpt])|hei\-|hi(pt|ta)|hp( i|ip)|hs\-c|ht(c(\-| |_|a|g|p|s|t)|tp)|"
+    r"hu(aw|tc)|i\-(20|go|ma)|i230|iac( |\-|\/)|ibro|idea|ig01|ikom|im1k|inno|ipaq|iris|ja([tv])a|jbro|jemu|jigs|"
+    r"kddi|keji|kgt( |\/)|klon|kpt |kwc\-|kyo([ck])|le(no|xi)|lg( g|\/([klu])|50|54|\-[a-w])|libw|lynx|m1\-w|m3ga|"
+    r"m50\/|ma(te|ui|xo)|mc(01|21|ca)|m\-cr|me(rc|ri)|mi(o8|oa|ts)|mmef|mo(01|02|bi|de|do|t(\-| |o|v)|zz)|"
+    r"mt(50|p1|v )|mwbp|mywa|n10[0-2]|n20[2-3]|n30([02])|n50([025])|n7(0([01])|10)|ne(([cm])\-|on|tf|wf|wg|wt)|"
+    r"nok([6i])|nzph|o2im|op(ti|wv)|oran|owg1|p800|pan([adt])|pdxg|pg(13|\-([1-8]|c))|phil|pire|pl(ay|uc)|pn\-2|"
+    r"po(ck|rt|se)|prox|psio|pt\-g|qa\-a|qc(07|12|21|32|60|\-[2-7]|i\-)|qtek|r380|r600|raks|rim9|ro(ve|zo)|s55\/|"
+    r"sa(ge|ma|mm|ms|ny|va)|sc(01|h\-|oo|p\-)|sdk\/|se(c(\-|0|1)|47|mc|nd|ri)|sgh\-|shar|sie(\-|m)|sk\-0|"
+    r"sl(45|id)|sm(al|ar|b3|it|t5)|so(ft|ny)|sp(01|h\-|v\-|v )|sy(01|mb)|t2(18|50)|t6(00|10|18)|ta(gt|lk)|tcl\-|"
+    r"tdg\-|tel([im])|tim\-|t\-mo|to(pl|sh)|ts(70|m\-|m3|m5)|tx\-9|up(\.b|g1|si)|utst|v400|v750|veri|vi(rg|te)|"
+    r"vk(40|5[0-3]|\-v)|vm40|voda|vulc|vx(52|53|60|61|70|80|81|83|85|98)|w3c(\-| )|webc|whit|wi(g |nc|nw)|wmlb|wonu|"
+    r"x700|yas\-|your|zeto|zte\-"
+)
+
+
+def expand_alternatives(pattern: str) -> list[str]:
+    def alternatives(index: int) -> tuple[list[str], int]:
+        results: list[str] = []
+        branch: list[str] = [""]
+        while index < len(pattern) and pattern[index] != ")":
+            if pattern[index] == "|":
+                results.extend(branch)
+                branch, index = [""], index + 1
+                continue
+            if pattern[index] == "(":
+                options, index = alternatives(index + 1)
+                index += 1
+            elif pattern[index] == "[":
+                end: int = pattern.index("]", index)
+                chars: str = pattern[index + 1 : end]
+                options = [c for c in chars if c != "-"]
+                for i in range(1, len(chars) - 1):
+                    if chars[i] == "-":
+                        options.extend(chr(c) for c in range(ord(chars[i - 1]) + 1, ord(chars[i + 1])))
+                index = end + 1
+            elif pattern[index] == "\\":
+                options, index = [pattern[index + 1]], index + 2
+            else:
+                options, index = [pattern[index]], index + 1
+            branch = [b + o for b in branch for o in options]
+        return results + branch, index
+
+    return alternatives(0)[0]
+
+
+@lru_cache
+def mobile_user_agent_pattern() -> Pattern:
+    return re_compile(mobile_user_agent_regex_a, IGNORECASE)
+
+
+@lru_cache
+def mobile_user_agent_prefixes() -> frozenset[str]:
+    return frozenset(p.lower() for p in expand_alternatives(mobile_user_agent_regex_b))
+
+
+@lru_cache(maxsize=1024)
+def is_user_agent_mobile(user_agent: str) -> bool:
+    return user_agent[:4].lower() in mobile_user_agent_prefixes() or bool(
+        mobile_user_agent_pattern().search(user_agent)
+    )